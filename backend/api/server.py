@@ -9,7 +9,7 @@ from typing import Any
 import httpx
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import ValidationError
 
@@ -115,8 +115,6 @@ FRONTEND_DIST_DIR = FRONTEND_DIR / "dist"
 @app.get("/")
 async def serve_index() -> FileResponse:
     """Serve the main index.html (React build or vanilla fallback)."""
-    from fastapi.responses import JSONResponse
-
     # Check React build first
     if FRONTEND_DIST_DIR.exists():
         index_path = FRONTEND_DIST_DIR / "index.html"
@@ -35,16 +35,4 @@ def aggregate_majority_vote(
     if len(scores) != 3:
         raise ValueError(f"Expected exactly 3 scores, got {len(scores)}")
 
-    sorted_scores = sorted(scores)
-    aggregated = sorted_scores[1]  # median of 3
-
-    pass_votes = sum(1 for s in scores if s >= pass_threshold)
-    passed = pass_votes >= 2  # majority (2 out of 3) must pass
-
-    return AggregatedScore(
-        individual_scores=scores,
-        aggregated_score=aggregated,
-        pass_threshold=pass_threshold,
-        pass_votes=pass_votes,
-        passed=passed,
-    )
+    return AggregatedScore.from_scores(scores, pass_threshold)
@@ -3,13 +3,22 @@
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Callable
-from typing import TYPE_CHECKING, Any
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
 
 from backend.core.dts.aggregator import aggregate_majority_vote
 from backend.core.dts.retry import llm_retry
 from backend.core.dts.types import AggregatedScore, DialogueNode
-from backend.core.dts.utils import format_message_history, log_phase
+from backend.core.dts.utils import log_phase
 from backend.core.prompts import prompts
 from backend.llm.types import Message
 from backend.utils.logging import logger
@@ -17,6 +26,102 @@ from backend.utils.logging import logger
 if TYPE_CHECKING:
     from backend.llm.client import LLM
 
+# Judge responses are only cached when sampling is close to deterministic;
+# at higher temperatures repeated samples are meant to differ.
+JUDGE_CACHE_MAX_TEMPERATURE = 0.3
+
+# Maximum sibling groups ranked together in one comparative judge call
+COMPARATIVE_BATCH_SIZE = 4
+
+# Maximum lone trajectories scored together in one cohort judge call
+COHORT_BATCH_SIZE = 6
+
+_T = TypeVar("_T")
+
+
+def _score_or_zero(value: Any) -> float:
+    """Coerce a judge-reported score to float, treating anything invalid as 0.0."""
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        return 0.0
+    return float(value)
+
+
+class _JudgeStore:
+    """
+    SQLite table of judge responses, shared across runs and processes.
+
+    Queries run in a worker thread with a short lock timeout, and any error
+    (including an unreadable row) is logged and treated as a cache miss; the
+    store never fails or stalls a judge call.
+    """
+
+    # Seconds to wait on another process's write lock before giving up
+    _LOCK_TIMEOUT = 0.5
+
+    def __init__(self, db: sqlite3.Connection, ttl: float) -> None:
+        self._db = db
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str, ttl: float) -> _JudgeStore | None:
+        """Open (creating if needed) the store at `path`; None if it cannot be used."""
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(
+                path, isolation_level=None, timeout=cls._LOCK_TIMEOUT, check_same_thread=False
+            )
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS judge_responses "
+                    "(key TEXT PRIMARY KEY, data TEXT NOT NULL, created REAL NOT NULL)"
+                )
+            except sqlite3.Error:
+                db.close()
+                raise
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Judge cache disabled, cannot open {path}: {e}")
+            return None
+        try:
+            db.execute("DELETE FROM judge_responses WHERE created < ?", (time.time() - ttl,))
+        except sqlite3.Error as e:
+            logger.debug(f"Judge cache cleanup skipped: {e}")
+        return cls(db, ttl)
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, data: dict[str, Any]) -> None:
+        await asyncio.to_thread(self._put, key, json.dumps(data))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _get(self, key: str) -> dict[str, Any] | None:
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT data FROM judge_responses WHERE key = ? AND created >= ?",
+                    (key, time.time() - self._ttl),
+                ).fetchone()
+            data = json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Judge cache read failed: {e}")
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _put(self, key: str, data: str) -> None:
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO judge_responses VALUES (?, ?, ?)",
+                    (key, data, time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Judge cache write failed: {e}")
+
 
 class TrajectoryEvaluator:
     """
@@ -39,6 +144,11 @@ class TrajectoryEvaluator:
         deep_research_context: str | None = None,
         provider: str | None = None,
         reasoning_enabled: bool = False,
+        cache_size: int = 1024,
+        prompt_caching: bool = False,
+        on_cache_hit: Callable[[], None] | None = None,
+        cache_path: str | None = None,
+        cache_ttl: float = 7 * 24 * 3600,
     ) -> None:
         """
         Initialize the evaluator.
@@ -54,6 +164,14 @@ class TrajectoryEvaluator:
             deep_research_context: Optional research context to inform judging.
             provider: Provider preference for OpenRouter (e.g., "Fireworks").
             reasoning_enabled: Enable reasoning tokens for LLM calls.
+            cache_size: Maximum judge responses kept in the exact-match cache
+                (0 disables it). Unused above JUDGE_CACHE_MAX_TEMPERATURE.
+            prompt_caching: Mark the judge rubric (system prompt) as a provider
+                prompt-cache breakpoint and send a matching prompt_cache_key.
+            on_cache_hit: Callback for each judge response served from the cache.
+            cache_path: SQLite file backing the judge cache, so responses are reused
+                across runs (None keeps the cache in memory only).
+            cache_ttl: Seconds a persisted judge response stays valid.
         """
         self.llm = llm
         self.goal = goal
@@ -65,11 +183,27 @@ class TrajectoryEvaluator:
         self.deep_research_context = deep_research_context
         self.provider = provider
         self.reasoning_enabled = reasoning_enabled
+        self.prompt_caching = prompt_caching
+        self._on_cache_hit = on_cache_hit
+        self._cache_size = cache_size if judge_temperature <= JUDGE_CACHE_MAX_TEMPERATURE else 0
+        self._cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._store = (
+            _JudgeStore.open(cache_path, cache_ttl) if cache_path and self._cache_size else None
+        )
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+        # Whether the provider honours n > 1 (None until the first batched call tells)
+        self._n_supported: bool | None = None
 
     def set_research_context(self, context: str | None) -> None:
         """Set or update the deep research context for judging."""
         self.deep_research_context = context
 
+    def close(self) -> None:
+        """Close the persistent judge cache, if one is open."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
     async def evaluate_absolute(
         self,
         nodes: list[DialogueNode],
@@ -112,30 +246,45 @@ class TrajectoryEvaluator:
         if len(nodes) <= 1:
             return await self.evaluate_absolute(nodes)
 
-        # Group nodes by parent (siblings compete)
-        groups: dict[str, list[DialogueNode]] = {}
+        # Group nodes by parent (siblings compete). Siblings with identical histories
+        # are judged once, through the first of them, and the others copy its result
+        groups: defaultdict[str, list[DialogueNode]] = defaultdict(list)
+        representatives: dict[tuple[str, str], DialogueNode] = {}
+        duplicates: list[tuple[DialogueNode, DialogueNode]] = []
         for node in nodes:
             parent_id = node.parent_id or "root"
-            if parent_id not in groups:
-                groups[parent_id] = []
-            groups[parent_id].append(node)
+            rep = representatives.setdefault((parent_id, node.history_text()), node)
+            if rep is node:
+                groups[parent_id].append(node)
+            else:
+                duplicates.append((rep, node))
 
         # Separate single-node groups from multi-node groups
-        single_nodes: list[DialogueNode] = []
-        multi_groups: list[tuple[str, list[DialogueNode]]] = []
+        single_nodes = [group[0] for group in groups.values() if len(group) == 1]
+        multi_groups = [(pid, group) for pid, group in groups.items() if len(group) > 1]
+        # Up to COMPARATIVE_BATCH_SIZE sibling groups share one judge call
+        batches = [
+            multi_groups[i : i + COMPARATIVE_BATCH_SIZE]
+            for i in range(0, len(multi_groups), COMPARATIVE_BATCH_SIZE)
+        ]
 
-        for parent_id, group in groups.items():
-            if len(group) == 1:
-                single_nodes.append(group[0])
-            else:
-                multi_groups.append((parent_id, group))
+        # Up to COHORT_BATCH_SIZE unrelated single nodes are scored in one cohort prompt
+        cohorts = [
+            single_nodes[i : i + COHORT_BATCH_SIZE]
+            for i in range(0, len(single_nodes), COHORT_BATCH_SIZE)
+        ]
 
         # Execute all judging in parallel
-        tasks = []
-        for node in single_nodes:
-            tasks.append(self._judge_single_wrapped(node))
-        for parent_id, group in multi_groups:
-            tasks.append(self._judge_group_comparative(parent_id, group))
+        tasks: list[Awaitable[dict[str, AggregatedScore]]] = [
+            self._judge_cohort(cohort) if len(cohort) > 1 else self._judge_single_wrapped(*cohort)
+            for cohort in cohorts
+        ]
+        tasks += [
+            self._judge_groups_batched(batch)
+            if len(batch) > 1
+            else self._judge_group_comparative(*batch[0])
+            for batch in batches
+        ]
 
         log_phase(
             logger,
@@ -154,11 +303,18 @@ class TrajectoryEvaluator:
                 continue
             scores_by_id.update(result)
 
+        for rep, node in duplicates:
+            if rep.id in scores_by_id:
+                scores_by_id[node.id] = scores_by_id[rep.id]
+                node.stats.judge_scores = list(rep.stats.judge_scores)
+                node.stats.aggregated_score = rep.stats.aggregated_score
+                node.stats.critiques = copy.deepcopy(rep.stats.critiques)
+
         return scores_by_id
 
     async def _judge_single(self, node: DialogueNode) -> tuple[AggregatedScore, dict | None]:
         """Run 3 parallel judges on a single trajectory. Returns (score, critiques)."""
-        history_str = format_message_history(node.messages)
+        history_str = node.history_text()
 
         system_prompt, user_prompt = prompts.trajectory_outcome_judge(
             conversation_goal=self.goal,
@@ -166,9 +322,8 @@ class TrajectoryEvaluator:
             deep_research_context=self.deep_research_context,
         )
 
-        # Run 3 judges in parallel
-        tasks = [self._call_llm_json(system_prompt, user_prompt) for _ in range(3)]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 3 independent judge samples, requested together
+        results = await self._call_llm_json_samples(system_prompt, user_prompt, 3)
 
         scores: list[float] = []
         judge_results: list[dict] = []
@@ -245,7 +400,7 @@ class TrajectoryEvaluator:
                 {
                     "id": node.id,
                     "intent_label": node.user_intent.label if node.user_intent else "unknown",
-                    "history": format_message_history(node.messages),
+                    "history": node.history_text(),
                 }
             )
 
@@ -256,14 +411,105 @@ class TrajectoryEvaluator:
         )
 
         result = await self._call_llm_json(system_prompt, user_prompt)
-        scores_by_id: dict[str, AggregatedScore] = {}
 
         if not result or "ranking" not in result:
             logger.warning(f"Comparative judge failed for {parent_id}, fallback to absolute")
             return await self._fallback_absolute(group)
 
-        ranking = result.get("ranking", [])
-        critiques = result.get("critiques", {})
+        return self._apply_ranking(group, result.get("ranking", []), result.get("critiques", {}))
+
+    async def _judge_groups_batched(
+        self, groups: list[tuple[str, list[DialogueNode]]]
+    ) -> dict[str, AggregatedScore]:
+        """
+        Rank several sibling groups with one judge call.
+
+        Each group is still ranked only against its own siblings; batching
+        shares the rubric and one round trip. Groups missing from the response
+        (all of them, if the call fails) are judged individually with
+        _judge_group_comparative(); a group whose own call also fails scores 0.
+        """
+        log_phase(
+            logger,
+            "JUDGE",
+            f"Ranking {len(groups)} sibling groups in one call "
+            f"({sum(len(g) for _, g in groups)} trajectories)",
+            indent=1,
+        )
+
+        batch = [
+            {
+                "parent_id": parent_id,
+                "trajectories": [
+                    {
+                        "id": node.id,
+                        "intent_label": node.user_intent.label if node.user_intent else "unknown",
+                        "history": node.history_text(),
+                    }
+                    for node in group
+                ],
+            }
+            for parent_id, group in groups
+        ]
+        system_prompt, user_prompt = prompts.batched_comparative_judge(
+            conversation_goal=self.goal,
+            groups=batch,
+            deep_research_context=self.deep_research_context,
+        )
+
+        try:
+            result = await self._call_llm_json(system_prompt, user_prompt)
+        except Exception as e:
+            # Every group is then judged on its own below
+            logger.warning(f"Batched comparative judge failed: {e}")
+            result = None
+        rankings = result.get("rankings") if result else None
+        if not isinstance(rankings, dict):
+            rankings = {}
+        critiques = result.get("critiques") if result else None
+        if not isinstance(critiques, dict):
+            critiques = {}
+
+        scores_by_id: dict[str, AggregatedScore] = {}
+        missing: list[tuple[str, list[DialogueNode]]] = []
+        for parent_id, group in groups:
+            ranking = rankings.get(parent_id)
+            if isinstance(ranking, list) and ranking:
+                scores_by_id.update(self._apply_ranking(group, ranking, critiques))
+            else:
+                missing.append((parent_id, group))
+
+        if missing:
+            logger.warning(
+                f"Batched comparative judge missed {len(missing)} groups, judging separately"
+            )
+            results = await asyncio.gather(
+                *(self._judge_group_comparative(pid, group) for pid, group in missing),
+                return_exceptions=True,
+            )
+            for (parent_id, group), result_scores in zip(missing, results):
+                if isinstance(result_scores, Exception):
+                    logger.error(f"Comparative judge failed for {parent_id}: {result_scores}")
+                    for node in group:
+                        scores_by_id[node.id] = AggregatedScore.zero(self.prune_threshold)
+                        node.stats.judge_scores = [0.0]
+                        node.stats.aggregated_score = 0.0
+                else:
+                    scores_by_id.update(result_scores)
+
+        return scores_by_id
+
+    def _apply_ranking(
+        self,
+        group: list[DialogueNode],
+        ranking: list[dict[str, Any]],
+        critiques: dict[str, Any],
+    ) -> dict[str, AggregatedScore]:
+        """Record a comparative ranking on a sibling group (unranked nodes score 0)."""
+        scores_by_id: dict[str, AggregatedScore] = {}
+        # Per-node log lines are only built when they will be emitted
+        verbose = logger.isEnabledFor(logging.INFO)
+        by_id = {node.id: node for node in group}
 
         for entry in ranking:
             node_id = entry.get("trajectory_id", "")
@@ -271,33 +517,34 @@ class TrajectoryEvaluator:
             score = entry.get("score", 0.0)
             reason = entry.get("reason", "")
 
-            node = next((n for n in group if n.id == node_id), None)
+            node = by_id.get(node_id)
             if not node:
                 continue
 
-            intent_label = node.user_intent.label if node.user_intent else "?"
-            strategy = node.strategy.tagline if node.strategy else "unknown"
-            log_phase(
-                logger,
-                "JUDGE",
-                f"Rank {rank}: '{strategy}' [{intent_label}] = {score}/10",
-                indent=2,
-            )
-            log_phase(logger, "JUDGE", f"  Reason: {reason}", indent=2)
-
-            # Log critiques (strengths, weaknesses, key_moment)
-            if node_id in critiques:
-                critique = critiques[node_id]
-                strengths = critique.get("strengths", [])
-                weaknesses = critique.get("weaknesses", [])
-                key_moment = critique.get("key_moment", "")
-
-                if strengths:
-                    log_phase(logger, "JUDGE", f"  Strengths: {strengths}", indent=2)
-                if weaknesses:
-                    log_phase(logger, "JUDGE", f"  Weaknesses: {weaknesses}", indent=2)
-                if key_moment:
-                    log_phase(logger, "JUDGE", f"  Key moment: {key_moment}", indent=2)
+            if verbose:
+                intent_label = node.user_intent.label if node.user_intent else "?"
+                strategy = node.strategy.tagline if node.strategy else "unknown"
+                log_phase(
+                    logger,
+                    "JUDGE",
+                    f"Rank {rank}: '{strategy}' [{intent_label}] = {score}/10",
+                    indent=2,
+                )
+                log_phase(logger, "JUDGE", f"  Reason: {reason}", indent=2)
+
+                # Log critiques (strengths, weaknesses, key_moment)
+                if node_id in critiques:
+                    critique = critiques[node_id]
+                    strengths = critique.get("strengths", [])
+                    weaknesses = critique.get("weaknesses", [])
+                    key_moment = critique.get("key_moment", "")
+
+                    if strengths:
+                        log_phase(logger, "JUDGE", f"  Strengths: {strengths}", indent=2)
+                    if weaknesses:
+                        log_phase(logger, "JUDGE", f"  Weaknesses: {weaknesses}", indent=2)
+                    if key_moment:
+                        log_phase(logger, "JUDGE", f"  Key moment: {key_moment}", indent=2)
 
             agg = AggregatedScore(
                 individual_scores=[score, score, score],
@@ -315,22 +562,92 @@ class TrajectoryEvaluator:
                 node.stats.critiques = critiques[node_id]
 
         # Handle missing nodes
-        for node in group:
-            if node.id not in scores_by_id:
-                scores_by_id[node.id] = AggregatedScore.zero(self.prune_threshold)
+        for node_id, node in by_id.items():
+            if node_id not in scores_by_id:
+                scores_by_id[node_id] = AggregatedScore.zero(self.prune_threshold)
                 node.stats.judge_scores = [0.0]
                 node.stats.aggregated_score = 0.0
 
         return scores_by_id
 
+    async def _judge_cohort(self, nodes: list[DialogueNode]) -> dict[str, AggregatedScore]:
+        """
+        Score unrelated nodes (each alone in its sibling group) in one prompt.
+
+        Every one of the 3 judge samples scores the whole cohort, and each
+        node's score is the majority vote of its 3 sample scores. Nodes that no
+        sample scored (or the whole cohort, if no sample is usable) fall back to
+        absolute judging.
+        """
+        log_phase(logger, "JUDGE", f"Scoring cohort of {len(nodes)} single nodes", indent=1)
+
+        trajectories = [
+            {
+                "id": node.id,
+                "intent_label": node.user_intent.label if node.user_intent else "unknown",
+                "history": node.history_text(),
+            }
+            for node in nodes
+        ]
+        system_prompt, user_prompt = prompts.trajectory_cohort_judge(
+            conversation_goal=self.goal,
+            trajectories=trajectories,
+            deep_research_context=self.deep_research_context,
+        )
+
+        results = await self._call_llm_json_samples(system_prompt, user_prompt, 3)
+        samples = [r for r in results if isinstance(r, dict) and isinstance(r.get("scores"), dict)]
+        if not samples:
+            logger.warning("Cohort judge failed, fallback to absolute")
+            return await self._fallback_absolute(nodes)
+
+        critiques = next(
+            (s["critiques"] for s in samples if isinstance(s.get("critiques"), dict)), {}
+        )
+        scores_by_id: dict[str, AggregatedScore] = {}
+        unscored: list[DialogueNode] = []
+        for node in nodes:
+            if all(node.id not in s["scores"] for s in samples):
+                unscored.append(node)
+                continue
+            # Failed samples and missing or malformed scores count as 0.0
+            scores = [_score_or_zero(s["scores"].get(node.id)) for s in samples]
+            scores += [0.0] * (3 - len(scores))
+            agg = aggregate_majority_vote(scores, pass_threshold=self.prune_threshold)
+            scores_by_id[node.id] = agg
+            node.stats.judge_scores = agg.individual_scores
+            node.stats.aggregated_score = agg.aggregated_score
+            if isinstance(critiques.get(node.id), dict):
+                node.stats.critiques = critiques[node.id]
+
+        if unscored:
+            logger.warning(f"Cohort judge skipped {len(unscored)} nodes, judging them separately")
+            scores_by_id.update(await self._fallback_absolute(unscored))
+
+        return scores_by_id
+
     async def _fallback_absolute(self, group: list[DialogueNode]) -> dict[str, AggregatedScore]:
-        """Fallback to absolute scoring for a group."""
-        tasks = [self._judge_single(node) for node in group]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """
+        Fallback to absolute scoring for a group.
+
+        Runs in a TaskGroup so that cancelling the caller cancels every judge
+        call; a judge error only zeroes that node's score.
+        """
+
+        async def judge(node: DialogueNode) -> tuple[AggregatedScore, dict | None] | None:
+            try:
+                return await self._judge_single(node)
+            except Exception as e:
+                logger.warning(f"Absolute judge failed for {node.id}: {e}")
+                return None
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(judge(node)) for node in group]
 
         scores_by_id: dict[str, AggregatedScore] = {}
-        for node, result in zip(group, results):
-            if isinstance(result, Exception):
+        for node, task in zip(group, tasks):
+            result = task.result()
+            if result is None:
                 agg = AggregatedScore.zero(self.prune_threshold)
                 critiques = None
             else:
@@ -343,28 +660,177 @@ class TrajectoryEvaluator:
 
         return scores_by_id
 
-    async def _call_llm_json(self, system_prompt: str, user_prompt: str) -> dict[str, Any] | None:
-        """Make an LLM call expecting JSON output with retry."""
-        async with self._sem:
-            return await self._call_llm_json_inner(system_prompt, user_prompt)
+    async def _call_llm_json(
+        self, system_prompt: str, user_prompt: str, sample: int = 0
+    ) -> dict[str, Any] | None:
+        """
+        Make an LLM call expecting JSON output with retry.
+
+        Identical prompts (e.g. a trajectory re-judged in a later round) are
+        answered from an exact-match LRU cache. `sample` keeps the independent
+        judges of one trajectory in separate cache entries.
+        """
+        key = self._cache_key(system_prompt, user_prompt, sample) if self._cache_size else None
+        cached = await self._cache_lookup(key)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> dict[str, Any] | None:
+            (result,) = await self._call_llm_json_inner(system_prompt, user_prompt)
+            await self._cache_store(key, result)
+            return result
+
+        return await self._single_flight(key, fetch)
+
+    async def _call_llm_json_samples(
+        self, system_prompt: str, user_prompt: str, n: int
+    ) -> list[dict[str, Any] | None | BaseException]:
+        """
+        Get `n` independent judge responses for one prompt.
+
+        Uncached samples are requested in a single n-sample call, so the prompt
+        is prefilled once. Samples the provider does not return (or all of
+        them, if the batched call fails) are fetched with parallel single calls.
+        Once a provider is seen to ignore `n`, later calls go straight to the
+        parallel single calls. Failed samples are returned as exceptions, as
+        with gather().
+        """
+        batch_key = None
+        if self._cache_size:
+            batch_key = self._cache_key(system_prompt, user_prompt, f"1..{n}")
+        return await self._single_flight(
+            batch_key, lambda: self._fetch_samples(system_prompt, user_prompt, n)
+        )
+
+    async def _fetch_samples(
+        self, system_prompt: str, user_prompt: str, n: int
+    ) -> list[dict[str, Any] | None | BaseException]:
+        """Body of _call_llm_json_samples (cache lookups, batched call, top-up)."""
+        keys = [
+            self._cache_key(system_prompt, user_prompt, i) if self._cache_size else None
+            for i in range(n)
+        ]
+        results: list[dict[str, Any] | None | BaseException] = [
+            await self._cache_lookup(key) for key in keys
+        ]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        if len(missing) > 1 and self._n_supported is not False:
+            try:
+                batch = await self._call_llm_json_inner(system_prompt, user_prompt, n=len(missing))
+            except Exception as e:
+                logger.debug(f"Batched judge call failed, judging samples separately: {e}")
+                batch = []
+            else:
+                self._n_supported = len(batch) >= len(missing)
+                if not self._n_supported:
+                    logger.debug("Provider ignored n, judging samples separately from now on")
+            for i, data in zip(missing, batch):
+                results[i] = data
+                await self._cache_store(keys[i], data)
+            missing = missing[len(batch) :]
+
+        if missing:
+            singles = await asyncio.gather(
+                *(self._call_llm_json(system_prompt, user_prompt, sample=i) for i in missing),
+                return_exceptions=True,
+            )
+            for i, result in zip(missing, singles):
+                results[i] = result
+        return results
+
+    async def _single_flight(self, key: str | None, call: Callable[[], Awaitable[_T]]) -> _T:
+        """
+        Run `call`, sharing its result with identical calls already in flight.
+
+        Concurrent judges of the same prompt (before the first one has reached
+        the cache) wait on one request instead of each sending their own.
+        """
+        if key is None:
+            return await call()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so a cancelled caller doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _cache_lookup(self, key: str | None) -> dict[str, Any] | None:
+        """Return a cached judge response (memory first, then the persistent store)."""
+        if key is None:
+            return None
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+        elif self._store is not None:
+            cached = await self._store.get(key)
+            if cached is not None:
+                self._remember(key, cached)
+        if cached is not None and self._on_cache_hit:
+            self._on_cache_hit()
+        return cached
+
+    async def _cache_store(self, key: str | None, result: dict[str, Any] | None) -> None:
+        """Cache a non-empty judge response, evicting the least recently used."""
+        if key is None or not result:
+            return
+        self._remember(key, result)
+        if self._store is not None:
+            await self._store.put(key, result)
+
+    def _remember(self, key: str, result: dict[str, Any]) -> None:
+        """Put a response in the in-memory LRU."""
+        self._cache[key] = result
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _cache_key(self, system_prompt: str, user_prompt: str, sample: int | str) -> str:
+        """Build the judge cache key from everything that affects the response."""
+        h = hashlib.sha256()
+        for part in (self.model or "", str(self.judge_temperature), str(sample)):
+            h.update(part.encode())
+            h.update(b"\0")
+        h.update(system_prompt.encode())
+        h.update(b"\0")
+        h.update(user_prompt.encode())
+        return h.hexdigest()
 
     @llm_retry(max_attempts=3)
     async def _call_llm_json_inner(
-        self, system_prompt: str, user_prompt: str
-    ) -> dict[str, Any] | None:
-        """Inner LLM call with retry logic."""
+        self, system_prompt: str, user_prompt: str, n: int = 1
+    ) -> list[dict[str, Any] | None]:
+        """
+        Inner LLM call with retry logic. Returns the parsed JSON of each sample.
+
+        The concurrency slot is held only for the request itself, not across
+        retry backoff.
+        """
+        extra: dict[str, Any] = {}
+        cache_control = None
+        if self.prompt_caching:
+            # The system prompt (rubric + research) is the same for every judge
+            # call of a kind within a run; the trajectories are in the user message
+            digest = hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+            extra["prompt_cache_key"] = f"judge:{digest}"
+            cache_control = {"type": "ephemeral"}
         messages = [
-            Message.system(system_prompt),
+            Message.system(system_prompt, cache_control=cache_control),
             Message.user(user_prompt),
         ]
-        completion = await self.llm.complete(
-            messages,
-            model=self.model,
-            temperature=self.judge_temperature,
-            structured_output=True,
-            provider=self.provider,
-            reasoning_enabled=self.reasoning_enabled,
-        )
+        async with self._sem:
+            completion = await self.llm.complete(
+                messages,
+                model=self.model,
+                temperature=self.judge_temperature,
+                structured_output=True,
+                provider=self.provider,
+                reasoning_enabled=self.reasoning_enabled,
+                n=n if n > 1 else None,
+                **extra,
+            )
         if self._on_usage:
             self._on_usage(completion, "judge")
-        return completion.data
+        if completion.samples is not None:
+            return [sample.data for sample in completion.samples]
+        return [completion.data]
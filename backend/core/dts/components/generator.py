@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
@@ -46,6 +47,7 @@ class StrategyGenerator:
         on_usage: Callable[[Any, str], None] | None = None,
         provider: str | None = None,
         reasoning_enabled: bool = False,
+        prompt_caching: bool = False,
     ) -> None:
         """
         Initialize the generator.
@@ -59,6 +61,8 @@ class StrategyGenerator:
             on_usage: Callback for token usage tracking (completion, phase).
             provider: Provider preference for OpenRouter (e.g., "Fireworks").
             reasoning_enabled: Enable reasoning tokens for LLM calls.
+            prompt_caching: Mark the fixed system prompts (including the research
+                context) for provider prompt caching.
         """
         self.llm = llm
         self.goal = goal
@@ -68,6 +72,7 @@ class StrategyGenerator:
         self._on_usage = on_usage
         self.provider = provider
         self.reasoning_enabled = reasoning_enabled
+        self.prompt_caching = prompt_caching
 
     async def generate_strategies(
         self,
@@ -93,7 +98,15 @@ class StrategyGenerator:
             deep_research_context=deep_research_context,
         )
 
-        result = await self._call_llm_json(system_prompt, user_prompt, phase="strategy")
+        # The research context sits in the system prompt; runs sharing it share a cache entry
+        cache_key = None
+        if deep_research_context:
+            digest = hashlib.sha256(deep_research_context.encode()).hexdigest()[:16]
+            cache_key = f"research:{digest}"
+
+        result = await self._call_llm_json(
+            system_prompt, user_prompt, phase="strategy", cache_key=cache_key
+        )
 
         if not result:
             raise RuntimeError("Strategy generation failed after retries")
@@ -127,7 +140,10 @@ class StrategyGenerator:
             conversation_history=format_message_history(history),
         )
 
-        result = await self._call_llm_json(system_prompt, user_prompt, phase="intent")
+        # The intent system prompt is fixed, so every intent call shares its prefix
+        result = await self._call_llm_json(
+            system_prompt, user_prompt, phase="intent", cache_key="intent"
+        )
 
         if not result:
             raise RuntimeError("Intent generation failed after retries")
@@ -139,11 +155,11 @@ class StrategyGenerator:
             try:
                 intents.append(
                     UserIntent(
-                        id=data.get("id", "unknown"),
-                        label=data.get("label", "Unknown"),
-                        description=data.get("description", ""),
-                        emotional_tone=data.get("emotional_tone", "neutral"),
-                        cognitive_stance=data.get("cognitive_stance", "neutral"),
+                        id=str(data.get("id", "unknown")),
+                        label=str(data.get("label", "Unknown")),
+                        description=str(data.get("description", "")),
+                        emotional_tone=str(data.get("emotional_tone", "neutral")),
+                        cognitive_stance=str(data.get("cognitive_stance", "neutral")),
                     )
                 )
             except Exception as e:
@@ -152,29 +168,44 @@ class StrategyGenerator:
         return intents
 
     async def _call_llm_json(
-        self, system_prompt: str, user_prompt: str, phase: str = "other"
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        phase: str = "other",
+        cache_key: str | None = None,
     ) -> dict[str, Any] | None:
-        """Make an LLM call expecting JSON output with retry."""
-        async with self._sem:
-            return await self._call_llm_json_inner(system_prompt, user_prompt, phase)
+        """
+        Make an LLM call expecting JSON output with retry.
+
+        With prompt_caching enabled, a `cache_key` marks the system prompt as a
+        cache breakpoint and is sent as the prompt_cache_key.
+        """
+        return await self._call_llm_json_inner(system_prompt, user_prompt, phase, cache_key)
 
     @llm_retry(max_attempts=3)
     async def _call_llm_json_inner(
-        self, system_prompt: str, user_prompt: str, phase: str
+        self, system_prompt: str, user_prompt: str, phase: str, cache_key: str | None = None
     ) -> dict[str, Any] | None:
-        """Inner LLM call with retry logic."""
+        """Inner LLM call with retry logic (the concurrency slot is not held during backoff)."""
+        extra: dict[str, Any] = {}
+        cache_control = None
+        if cache_key is not None and self.prompt_caching:
+            extra["prompt_cache_key"] = cache_key
+            cache_control = {"type": "ephemeral"}
         messages = [
-            Message.system(system_prompt),
+            Message.system(system_prompt, cache_control=cache_control),
             Message.user(user_prompt),
         ]
-        completion = await self.llm.complete(
-            messages,
-            model=self.model,
-            temperature=self.temperature,
-            structured_output=True,
-            provider=self.provider,
-            reasoning_enabled=self.reasoning_enabled,
-        )
+        async with self._sem:
+            completion = await self.llm.complete(
+                messages,
+                model=self.model,
+                temperature=self.temperature,
+                structured_output=True,
+                provider=self.provider,
+                reasoning_enabled=self.reasoning_enabled,
+                **extra,
+            )
         if self._on_usage:
             self._on_usage(completion, phase)
         return completion.data
@@ -3,7 +3,11 @@
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Callable
+import hashlib
+import logging
+import re
+from collections.abc import Callable, Coroutine
+from dataclasses import replace
 from typing import TYPE_CHECKING, Any
 
 from tenacity import (
@@ -16,8 +20,8 @@ from tenacity import (
 from backend.core.dts.tree import generate_node_id
 from backend.core.dts.types import DialogueNode, NodeStatus, Strategy, UserIntent
 from backend.core.dts.utils import create_event_emitter, log_phase
-from backend.core.prompts import prompts
-from backend.llm.types import Completion, Message
+from backend.core.prompts import PromptPair, prompts
+from backend.llm.types import Completion, Message, Usage
 from backend.utils.logging import logger
 
 if TYPE_CHECKING:
@@ -31,7 +35,7 @@ class LLMEmptyResponseError(Exception):
     pass
 
 
-TERMINATION_SIGNALS = [
+TERMINATION_SIGNALS = (
     "goodbye",
     "bye",
     "i'm done",
@@ -49,7 +53,33 @@ TERMINATION_SIGNALS = [
     "i'm confused",
     "you're not helping",
     "i don't understand",
-]
+)
+
+# Words that end a conversation when they appear in a short (< 20 char) reply
+SHORT_NEGATIVE_SIGNALS = ("no", "nope", "wrong", "bad", "ugh")
+
+# One-pass matchers (same substring semantics as checking each signal with `in`)
+_TERMINATION_RE = re.compile("|".join(map(re.escape, TERMINATION_SIGNALS)))
+_SHORT_NEGATIVE_RE = re.compile("|".join(map(re.escape, SHORT_NEGATIVE_SIGNALS)))
+_LONGEST_SIGNAL = max(map(len, TERMINATION_SIGNALS))
+
+# Rough characters per token, for usage of streams cut short before the provider reports it
+_CHARS_PER_TOKEN = 4
+
+
+def _estimate_usage(messages: list[Message], reply: str) -> Usage:
+    """Estimate the token usage of a call from its text (~_CHARS_PER_TOKEN chars/token)."""
+    prompt_tokens = sum(len(m.content or "") for m in messages) // _CHARS_PER_TOKEN
+    completion_tokens = len(reply) // _CHARS_PER_TOKEN
+    return Usage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+# Deadline for one forked branch expansion, per conversation turn
+EXPANSION_TIMEOUT_PER_TURN = 120.0
 
 
 class ConversationSimulator:
@@ -74,6 +104,8 @@ class ConversationSimulator:
         on_event: Callable[[str, dict[str, Any]], Any] | None = None,
         provider: str | None = None,
         reasoning_enabled: bool = False,
+        prompt_caching: bool = False,
+        stream_user_simulation: bool = False,
     ) -> None:
         """
         Initialize the simulator.
@@ -88,16 +120,33 @@ class ConversationSimulator:
             on_event: Async callback for emitting events to UI.
             provider: Provider preference for OpenRouter (e.g., "Fireworks").
             reasoning_enabled: Enable reasoning tokens for LLM calls.
+            prompt_caching: Send a prompt_cache_key with turn generation calls and mark
+                their system prompts as cache breakpoints.
+            stream_user_simulation: Stream user replies and stop reading at the first
+                termination signal.
         """
         self.llm = llm
         self.goal = goal
         self.model = model
         self.temperature = temperature
         self._sem = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
         self._on_usage = on_usage
         self._emit = create_event_emitter(on_event, logger)
         self.provider = provider
         self.reasoning_enabled = reasoning_enabled
+        self.prompt_caching = prompt_caching
+        self.stream_user_simulation = stream_user_simulation
+        # Turn prompts depend only on the goal and strategy, so they are built
+        # once per run (and per strategy) rather than on every turn
+        self._user_sim_prompts = prompts.user_simulation(conversation_goal=goal)
+        self._assistant_prompts: dict[tuple[str, str], PromptPair] = {}
+        # User-simulation prompts share one prefix (system prompt + opening
+        # messages) across branches, so they share one cache routing key;
+        # assistant prompts differ per strategy and are keyed per branch
+        self._user_cache_key = "user:" + hashlib.sha256(goal.encode()).hexdigest()[:16]
+        # Anthropic-style breakpoint after each system prompt
+        self._cache_control = {"type": "ephemeral"} if prompt_caching else None
 
     async def expand_nodes(
         self,
@@ -132,13 +181,33 @@ class ConversationSimulator:
             indent=1,
         )
 
-        # Generate intents for all nodes in parallel
-        intent_tasks = [generate_intents(node.messages, intents_per_node) for node in nodes]
-        all_intents = await asyncio.gather(*intent_tasks, return_exceptions=True)
+        # Generate intents in parallel, once per distinct history (e.g. every
+        # initial branch starts from the same first message)
+        history_slot: dict[tuple[tuple[str, str | None], ...], int] = {}
+        histories: list[list[Message]] = []
+        node_slots: list[int] = []
+        for node in nodes:
+            key = tuple((m.role, m.content) for m in node.messages)
+            slot = history_slot.get(key)
+            if slot is None:
+                slot = history_slot[key] = len(histories)
+                histories.append(node.messages)
+            node_slots.append(slot)
+
+        unique_intents = await asyncio.gather(
+            *(generate_intents(history, intents_per_node) for history in histories),
+            return_exceptions=True,
+        )
+        # Each node gets its own UserIntent objects
+        all_intents = [
+            [replace(intent) for intent in result] if isinstance(result, list) else result
+            for result in (unique_intents[slot] for slot in node_slots)
+        ]
 
         # Build expansion workload
         expansion_tasks = []
         fallback_nodes = []
+        verbose = logger.isEnabledFor(logging.INFO)
 
         for node, intents_result in zip(nodes, all_intents):
             if isinstance(intents_result, Exception) or not intents_result:
@@ -148,15 +217,17 @@ class ConversationSimulator:
 
             intents = intents_result
             strategy_name = node.strategy.tagline if node.strategy else "root"
-            log_phase(logger, "FORK", f"'{strategy_name}': {len(intents)} intents", indent=2)
+            if verbose:
+                log_phase(logger, "FORK", f"'{strategy_name}': {len(intents)} intents", indent=2)
 
             for idx, intent in enumerate(intents):
-                log_phase(
-                    logger,
-                    "FORK",
-                    f"  [{intent.emotional_tone}] {intent.label}",
-                    indent=2,
-                )
+                if verbose:
+                    log_phase(
+                        logger,
+                        "FORK",
+                        f"  [{intent.emotional_tone}] {intent.label}",
+                        indent=2,
+                    )
                 # Emit intent_generated event for UI
                 self._emit(
                     "intent_generated",
@@ -170,14 +241,16 @@ class ConversationSimulator:
                     },
                 )
 
-                # Create forked child
+                # Create forked child. It shares the parent's message list: node
+                # histories are never mutated in place (expansion copies before
+                # appending and then reassigns), so no copy is needed here.
                 child = DialogueNode(
                     id=generate_node_id(),
                     parent_id=node.id,
                     depth=node.depth + 1,
                     strategy=node.strategy,
                     user_intent=intent,
-                    messages=list(node.messages),
+                    messages=node.messages,
                 )
 
                 if tree:
@@ -189,27 +262,38 @@ class ConversationSimulator:
         for node in fallback_nodes:
             expansion_tasks.append(self._expand_linear(node, turns))
 
-        # Execute all expansions with as_completed
+        # Execute all expansions, collecting results as they finish
         log_phase(logger, "FORK", f"Expanding {len(expansion_tasks)} branches...", indent=1)
 
-        expanded = []
+        expanded: list[DialogueNode] = []
         completed = 0
         failed = 0
-        # Total timeout scales with task count (2 minutes per task)
-        total_timeout = 120.0 * max(1, len(expansion_tasks))
-
-        for coro in asyncio.as_completed(expansion_tasks, timeout=total_timeout):
-            try:
-                result = await coro
-                if isinstance(result, DialogueNode):
-                    expanded.append(result)
-                    completed += 1
-            except TimeoutError:
-                logger.warning("Expansion timed out")
-                failed += 1
-            except Exception as e:
-                logger.error(f"Expansion error: {e}")
-                failed += 1
+        # At most max_concurrency expansions run at once, and each one's deadline
+        # starts when it does, so queued expansions can't time out before starting
+        slots = asyncio.Semaphore(self._max_concurrency)
+        task_timeout = EXPANSION_TIMEOUT_PER_TURN * max(1, turns)
+
+        async def run_expansion(coro: Coroutine[Any, Any, DialogueNode]) -> None:
+            nonlocal completed, failed
+            async with slots:
+                try:
+                    async with asyncio.timeout(task_timeout):
+                        result = await coro
+                except TimeoutError:
+                    logger.warning("Expansion timed out")
+                    failed += 1
+                    return
+                except Exception as e:
+                    logger.error(f"Expansion error: {e}")
+                    failed += 1
+                    return
+            expanded.append(result)
+            completed += 1
+
+        # Errors are handled per task, so one failure never cancels the others
+        async with asyncio.TaskGroup() as tg:
+            for coro in expansion_tasks:
+                tg.create_task(run_expansion(coro))
 
         log_phase(logger, "FORK", f"Completed: {completed} | Failed: {failed}", indent=1)
         return expanded
@@ -257,7 +341,7 @@ class ConversationSimulator:
 
         if not skip_user_simulation:
             try:
-                user_response = await self._simulate_user(history)
+                user_response = await self._simulate_user(history, cache_key=self._user_cache_key)
             except LLMEmptyResponseError:
                 log_phase(
                     logger,
@@ -270,12 +354,13 @@ class ConversationSimulator:
                 return False
 
             history.append(Message.user(user_response))
-            log_phase(
-                logger,
-                "EXPAND",
-                f"[Turn {turn_num}]{label_suffix} User: {user_response[:100]}...",
-                indent=2,
-            )
+            if logger.isEnabledFor(logging.INFO):
+                log_phase(
+                    logger,
+                    "EXPAND",
+                    f"[Turn {turn_num}]{label_suffix} User: {user_response[:100]}...",
+                    indent=2,
+                )
 
             if self._should_terminate(user_response):
                 log_phase(logger, "EXPAND", f"[Turn {turn_num}] EARLY EXIT", indent=2)
@@ -283,7 +368,9 @@ class ConversationSimulator:
                 return False
 
         try:
-            assistant_response = await self._generate_assistant(history, node.strategy)
+            assistant_response = await self._generate_assistant(
+                history, node.strategy, cache_key=node.id
+            )
         except LLMEmptyResponseError:
             log_phase(
                 logger,
@@ -296,12 +383,13 @@ class ConversationSimulator:
             return False
 
         history.append(Message.assistant(assistant_response))
-        log_phase(
-            logger,
-            "EXPAND",
-            f"[Turn {turn_num}]{label_suffix} Assistant: {assistant_response[:100]}...",
-            indent=2,
-        )
+        if logger.isEnabledFor(logging.INFO):
+            log_phase(
+                logger,
+                "EXPAND",
+                f"[Turn {turn_num}]{label_suffix} Assistant: {assistant_response[:100]}...",
+                indent=2,
+            )
         return True
 
     async def _expand_linear(self, node: DialogueNode, turns: int) -> DialogueNode:
@@ -368,16 +456,19 @@ class ConversationSimulator:
             cognitive_stance=intent.cognitive_stance,
         )
 
-        messages = [Message.system(system_prompt), Message.user(user_prompt)]
+        messages = [
+            Message.system(system_prompt, cache_control=self._cache_control),
+            Message.user(user_prompt),
+        ]
         return await self._call_llm_with_retry(messages, phase="rephrase")
 
     async def _simulate_user(
         self,
         history: list[Message],
         intent: UserIntent | None = None,
+        cache_key: str | None = None,
     ) -> str:
         """Simulate a user response with retry on empty responses."""
-        intent_dict = None
         if intent:
             intent_dict = {
                 "label": intent.label,
@@ -385,43 +476,63 @@ class ConversationSimulator:
                 "emotional_tone": intent.emotional_tone,
                 "cognitive_stance": intent.cognitive_stance,
             }
-
-        system_prompt, user_prompt = prompts.user_simulation(
-            conversation_goal=self.goal,
-            user_intent=intent_dict,
-        )
+            system_prompt, user_prompt = prompts.user_simulation(
+                conversation_goal=self.goal,
+                user_intent=intent_dict,
+            )
+        else:
+            system_prompt, user_prompt = self._user_sim_prompts
 
         # System prompt + conversation history + continuation request
-        messages = [Message.system(system_prompt)] + history + [Message.user(user_prompt)]
-        return await self._call_llm_with_retry(messages, phase="user")
+        messages = [
+            Message.system(system_prompt, cache_control=self._cache_control),
+            *history,
+            Message.user(user_prompt),
+        ]
+        return await self._call_llm_with_retry(
+            messages, phase="user", cache_key=cache_key, stream=self.stream_user_simulation
+        )
 
     async def _generate_assistant(
         self,
         history: list[Message],
         strategy: Strategy | None,
+        cache_key: str | None = None,
     ) -> str:
         """Generate an assistant response with retry on empty responses."""
-        system_prompt, user_prompt = prompts.assistant_continuation(
-            conversation_goal=self.goal,
-            strategy_tagline=strategy.tagline if strategy else "",
-            strategy_description=strategy.description if strategy else "",
-        )
+        key = (strategy.tagline, strategy.description) if strategy else ("", "")
+        pair = self._assistant_prompts.get(key)
+        if pair is None:
+            pair = self._assistant_prompts[key] = prompts.assistant_continuation(
+                conversation_goal=self.goal,
+                strategy_tagline=key[0],
+                strategy_description=key[1],
+            )
+        system_prompt, user_prompt = pair
 
         # System prompt + conversation history + continuation request
-        messages = [Message.system(system_prompt)] + history + [Message.user(user_prompt)]
-        return await self._call_llm_with_retry(messages, phase="assistant")
+        messages = [
+            Message.system(system_prompt, cache_control=self._cache_control),
+            *history,
+            Message.user(user_prompt),
+        ]
+        return await self._call_llm_with_retry(messages, phase="assistant", cache_key=cache_key)
 
     async def _call_llm_with_retry(
         self,
         messages: list[Message],
         phase: str,
         max_retries: int = 3,
+        cache_key: str | None = None,
+        stream: bool = False,
     ) -> str:
         """
         Call LLM with retry logic for empty responses.
 
         Uses tenacity for exponential backoff. Raises LLMEmptyResponseError
-        if all retries are exhausted.
+        if all retries are exhausted. `cache_key` identifies the branch for
+        provider prompt caching (sent only when prompt_caching is enabled).
+        With `stream`, the reply is read only up to the first termination signal.
         """
 
         @retry(
@@ -431,8 +542,13 @@ class ConversationSimulator:
             reraise=True,
         )
         async def _attempt() -> str:
-            completion = await self._call_llm(messages, phase=phase)
-            content = completion.message.content
+            if stream:
+                content = await self._stream_until_termination(
+                    messages, phase=phase, cache_key=cache_key
+                )
+            else:
+                completion = await self._call_llm(messages, phase=phase, cache_key=cache_key)
+                content = completion.message.content
             if not content or not content.strip():
                 logger.warning(f"Empty LLM response for phase '{phase}', retrying...")
                 raise LLMEmptyResponseError(f"Empty response for phase '{phase}'")
@@ -450,17 +566,101 @@ class ConversationSimulator:
         """Check if response signals conversation end."""
         response_lower = user_response.lower().strip()
 
-        for signal in TERMINATION_SIGNALS:
-            if signal in response_lower:
-                return True
+        if _TERMINATION_RE.search(response_lower):
+            return True
 
         # Short frustrated responses
-        return len(response_lower) < 20 and any(
-            w in response_lower for w in ["no", "nope", "wrong", "bad", "ugh"]
-        )
+        return len(response_lower) < 20 and _SHORT_NEGATIVE_RE.search(response_lower) is not None
+
+    async def _stream_until_termination(
+        self, messages: list[Message], phase: str = "other", cache_key: str | None = None
+    ) -> str:
+        """
+        Stream a completion, returning early once a termination signal appears.
+
+        The signals match as substrings, so a signal in the partial reply is
+        also in the full reply and _should_terminate() decides the same way;
+        the remaining tokens are simply not generated.
+
+        Usage is reported to on_usage like any other call. A stream stopped
+        early never receives the provider's usage, so its usage is estimated
+        from the prompt and the part of the reply that was read.
+        """
+        extra: dict[str, Any] = {}
+        if cache_key is not None and self.prompt_caching:
+            extra["prompt_cache_key"] = cache_key
+        reported: list[tuple[Usage, str]] = []
+        if self._on_usage:
+            extra["on_usage"] = lambda usage, model: reported.append((usage, model))
+        chunks: list[str] = []
+        lowered = ""
+        async with self._sem:
+            stream = self.llm.stream(
+                messages,
+                model=self.model,
+                temperature=self.temperature,
+                provider=self.provider,
+                reasoning_enabled=self.reasoning_enabled,
+                **extra,
+            )
+            try:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    # Only the tail can contain a signal that was not there before
+                    start = max(0, len(lowered) - _LONGEST_SIGNAL)
+                    lowered += chunk.lower()
+                    if _TERMINATION_RE.search(lowered, start):
+                        break
+            finally:
+                await stream.aclose()
+        reply = "".join(chunks)
+        if self._on_usage:
+            if reported:
+                usage, model = reported[-1]
+            else:
+                usage, model = _estimate_usage(messages, reply), self.model
+            self._on_usage(
+                Completion(message=Message.assistant(reply), usage=usage, model=model), phase
+            )
+        return reply
 
-    async def _call_llm(self, messages: list[Message], phase: str = "other") -> Completion:
+    async def warm_prompt_cache(self, history: list[Message]) -> None:
+        """
+        Prefill the shared user-simulation prefix before branches fan out.
+
+        Parallel requests with an identical cold prefix can each land on a
+        different provider machine and all miss the cache. One single-token
+        request first lets the rest of the fan-out hit it. A no-op unless
+        prompt_caching is enabled; failures are logged and ignored.
+        """
+        if not self.prompt_caching:
+            return
+        system_prompt, user_prompt = self._user_sim_prompts
+        messages = [
+            Message.system(system_prompt, cache_control=self._cache_control),
+            *history,
+            Message.user(user_prompt),
+        ]
+        try:
+            await self._call_llm(
+                messages, phase="user", cache_key=self._user_cache_key, max_tokens=1
+            )
+        except Exception as e:
+            logger.warning(f"Prompt cache warm-up failed: {e}")
+
+    async def _call_llm(
+        self,
+        messages: list[Message],
+        phase: str = "other",
+        cache_key: str | None = None,
+        max_tokens: int | None = None,
+    ) -> Completion:
         """Make an LLM call."""
+        extra: dict[str, Any] = {}
+        if cache_key is not None and self.prompt_caching:
+            extra["prompt_cache_key"] = cache_key
+        if max_tokens is not None:
+            extra["max_tokens"] = max_tokens
         async with self._sem:
             completion = await self.llm.complete(
                 messages,
@@ -468,7 +668,8 @@ class ConversationSimulator:
                 temperature=self.temperature,
                 provider=self.provider,
                 reasoning_enabled=self.reasoning_enabled,
+                **extra,
             )
-            if self._on_usage:
-                self._on_usage(completion, phase)
-            return completion
+        if self._on_usage:
+            self._on_usage(completion, phase)
+        return completion
@@ -28,6 +28,9 @@ class DTSConfig:
         first_message: Initial user message to start the conversation.
         init_branches: Number of initial strategy branches to create.
         deep_research: Whether to include deep research context.
+        speculative_strategies: With deep_research, generate strategies without research
+            context while research runs; keep whichever finishes first (research still
+            informs the judges).
         turns_per_branch: Number of turns (user+assistant) per expansion.
         user_intents_per_branch: Number of user intents to fork per expansion (1 = no forking).
         user_variability: Generate diverse user intents. When False, uses fixed "healthily critical + engaged" persona.
@@ -35,7 +38,11 @@ class DTSConfig:
         prune_threshold: Score threshold for pruning (0-10).
         keep_top_k: Keep only top K branches after pruning (optional).
         min_survivors: Minimum branches to keep even if below threshold.
-        max_concurrency: Maximum concurrent LLM calls.
+        max_concurrency: Maximum concurrent LLM calls (per component: generation,
+            simulation and judging each have their own limit).
+        judge_concurrency: Maximum concurrent judge calls (defaults to max_concurrency).
+            Judges use a separate limit from simulation, so a slow judging pass never
+            holds slots that conversation generation needs.
         model: Default model to use (fallback for per-phase models).
         strategy_model: Model for strategy/intent generation.
         simulator_model: Model for conversation simulation.
@@ -43,6 +50,18 @@ class DTSConfig:
         temperature: Temperature for conversation generation.
         judge_temperature: Temperature for judge evaluations (lower = more deterministic).
         reasoning_enabled: Enable reasoning tokens for LLM calls (increases cost but may improve quality).
+        prompt_caching: Send a `prompt_cache_key` with simulation calls (per branch for
+            assistant turns, shared for user turns) so that OpenAI-style providers route
+            requests with a common prefix to the same prompt cache, prefill that cache
+            with one request before the first fan-out, and mark every system prompt
+            (including the deep research context) as an Anthropic-style cache breakpoint.
+        stream_user_simulation: Stream simulated user replies and stop reading as soon as
+            a termination signal appears, instead of waiting for the full reply. Usage of
+            a stream stopped early is estimated (~4 characters per token).
+        judge_cache_path: SQLite file that persists judge responses, so runs on the same
+            goal reuse the verdicts of identical trajectories (None keeps the judge cache
+            in memory for the run). Only used at judge_temperature <= 0.3.
+        judge_cache_ttl: Seconds a persisted judge response stays valid.
         provider: Provider preference for OpenRouter (e.g., "Fireworks").
     """
 
@@ -50,6 +69,7 @@ class DTSConfig:
     first_message: str
     init_branches: int = 6
     deep_research: bool = False
+    speculative_strategies: bool = False
     research_cache_dir: str = ".cache/research"
     turns_per_branch: int = 5
     user_intents_per_branch: int = 3
@@ -59,6 +79,7 @@ class DTSConfig:
     keep_top_k: int | None = None
     min_survivors: int = 1
     max_concurrency: int = 16
+    judge_concurrency: int | None = None
     model: str | None = None
     strategy_model: str | None = None
     simulator_model: str | None = None
@@ -66,4 +87,8 @@ class DTSConfig:
     temperature: float = 0.7
     judge_temperature: float = 0.3
     reasoning_enabled: bool = False
+    prompt_caching: bool = False
+    stream_user_simulation: bool = False
+    judge_cache_path: str | None = None
+    judge_cache_ttl: float = 7 * 24 * 3600
     provider: str | None = None  # Let OpenRouter choose the best provider
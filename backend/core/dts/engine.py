@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import logging
 from collections.abc import Callable
+from operator import itemgetter
 from typing import TYPE_CHECKING
 
 from backend.core.dts.components.evaluator import TrajectoryEvaluator
@@ -17,9 +20,11 @@ from backend.core.dts.types import (
     DialogueNode,
     DTSRunResult,
     NodeStatus,
+    Strategy,
     TokenTracker,
+    load_pricing,
 )
-from backend.core.dts.utils import emit_event, log_phase
+from backend.core.dts.utils import EventPump, log_phase
 from backend.llm.client import LLM
 from backend.llm.types import Completion, Message
 from backend.utils.logging import logger
@@ -30,6 +35,16 @@ if TYPE_CHECKING:
     EventCallback = Callable[[str, dict], Awaitable[None]]
 
 
+# Component phase names -> TokenTracker phase names (others pass through unchanged)
+_USAGE_PHASES = {
+    "strategy": "strategy_generation",
+    "intent": "intent_generation",
+    "user": "user_simulation",
+    "assistant": "assistant_generation",
+    "judge": "judging",
+}
+
+
 class DTSEngine:
     """
     Dialogue Tree Search Engine.
@@ -88,6 +103,7 @@ class DTSEngine:
             on_usage=self._track_usage,
             provider=config.provider,
             reasoning_enabled=config.reasoning_enabled,
+            prompt_caching=config.prompt_caching,
         )
 
         self._simulator = ConversationSimulator(
@@ -100,6 +116,8 @@ class DTSEngine:
             on_event=self._emit,
             provider=config.provider,
             reasoning_enabled=config.reasoning_enabled,
+            prompt_caching=config.prompt_caching,
+            stream_user_simulation=config.stream_user_simulation,
         )
 
         self._evaluator = TrajectoryEvaluator(
@@ -108,10 +126,14 @@ class DTSEngine:
             model=judge_model,
             judge_temperature=config.judge_temperature,
             prune_threshold=config.prune_threshold,
-            max_concurrency=config.max_concurrency,
+            max_concurrency=config.judge_concurrency or config.max_concurrency,
             on_usage=self._track_usage,
             provider=config.provider,
             reasoning_enabled=config.reasoning_enabled,
+            prompt_caching=config.prompt_caching,
+            on_cache_hit=self._track_cache_hit,
+            cache_path=config.judge_cache_path,
+            cache_ttl=config.judge_cache_ttl,
         )
 
         self._researcher = DeepResearcher(
@@ -123,14 +145,17 @@ class DTSEngine:
         )
 
         self._tree: DialogueTree | None = None
-        self._event_callback: EventCallback | None = None
+        self._events = EventPump(None, logger)
         self._research_report: str | None = None
+        self._research_task: asyncio.Task[str | None] | None = None
+        self._pricing_load: asyncio.Task[None] | None = None
 
-    def set_event_callback(self, callback: EventCallback) -> None:
+    def set_event_callback(self, callback: EventCallback | list[EventCallback]) -> None:
         """
         Set a callback for receiving real-time events during the run.
 
-        The callback receives (event_type, data) and should be async.
+        The callback receives (event_type, data) and should be async. Pass a
+        list to fan each event out to several observers concurrently.
         Event types:
         - "round_started": { round, total_rounds }
         - "node_added": { node data }
@@ -138,18 +163,34 @@ class DTSEngine:
         - "nodes_pruned": { ids, reasons }
         - "token_update": { totals }
         """
-        self._event_callback = callback
+        self._events = EventPump(callback, logger)
+
+    def close(self) -> None:
+        """Release resources held across runs (the persistent judge cache)."""
+        self._evaluator.close()
 
     async def run(self, rounds: int = 1) -> DTSRunResult:
         """
         Execute the dialogue tree search.
 
+        Every event emitted during the run has been delivered to the event
+        callback by the time this returns (or raises).
+
         Args:
             rounds: Number of expansion/pruning rounds.
 
         Returns:
             DTSRunResult with best trajectory and statistics.
         """
+        try:
+            return await self._run(rounds)
+        finally:
+            await self._cancel_research()
+            await self._cancel_pricing_load()
+            await self._events.flush()
+
+    async def _run(self, rounds: int) -> DTSRunResult:
+        """Run the search rounds (see run())."""
         cfg = self.config
 
         logger.info("=" * 60)
@@ -189,8 +230,12 @@ class DTSEngine:
         # Initialize tree
         log_phase(logger, "INIT", "Creating tree structure...")
         self._emit("phase", {"phase": "initializing", "message": "Creating tree structure..."})
+        # The tree is only published on self once the run completes; a failed
+        # run leaves self._tree as None rather than pinning a half-built tree.
+        self._tree = None
+        # Cost reporting needs OpenRouter pricing; fetch it alongside the search
+        self._pricing_load = asyncio.create_task(load_pricing())
         tree = await self._initialize_tree()
-        self._tree = tree
 
         total_pruned = 0
 
@@ -262,6 +307,10 @@ class DTSEngine:
 
                 generate_intents_fn = fixed_intent_fn
 
+            if round_num == 0 and len(expandable) > 1:
+                # All branches open with the same messages; prefill that prefix once
+                await self._simulator.warm_prompt_cache(expandable[0].messages)
+
             expanded = await self._simulator.expand_nodes(
                 expandable,
                 turns=cfg.turns_per_branch,
@@ -286,6 +335,9 @@ class DTSEngine:
                     },
                 )
 
+            # Judges need the research context if it is still being gathered
+            await self._await_research()
+
             # Score branches
             self._emit(
                 "phase",
@@ -312,16 +364,18 @@ class DTSEngine:
                 scores = await self._evaluator.evaluate_absolute(expanded)
 
             # Log scores and emit events
+            verbose = logger.isEnabledFor(logging.INFO)
             for node in expanded:
                 if node.id in scores:
                     score = scores[node.id]
-                    intent_str = f" [{node.intent_label}]" if node.intent_label else ""
-                    log_phase(
-                        logger,
-                        "JUDGE",
-                        f"'{node.strategy_label}'{intent_str}: {score.aggregated_score:.1f}/10",
-                        indent=1,
-                    )
+                    if verbose:
+                        intent_str = f" [{node.intent_label}]" if node.intent_label else ""
+                        log_phase(
+                            logger,
+                            "JUDGE",
+                            f"'{node.strategy_label}'{intent_str}: {score.aggregated_score:.1f}/10",
+                            indent=1,
+                        )
                     # Emit score update
                     self._emit(
                         "node_updated",
@@ -360,7 +414,7 @@ class DTSEngine:
             )
 
             # Emit pruning event
-            pruned_nodes = [n for n in expanded if n.status == NodeStatus.PRUNED]
+            pruned_nodes = [n for n in expanded if n.status is NodeStatus.PRUNED]
             if pruned_nodes:
                 self._emit(
                     "nodes_pruned",
@@ -382,14 +436,18 @@ class DTSEngine:
                 },
             )
 
-            for node in survivors:
-                intent_str = f" [{node.intent_label}]" if node.intent_label else ""
-                log_phase(
-                    logger,
-                    "PRUNE",
-                    f"Survivor: '{node.strategy_label}'{intent_str}",
-                    indent=2,
-                )
+            if verbose:
+                for node in survivors:
+                    intent_str = f" [{node.intent_label}]" if node.intent_label else ""
+                    log_phase(
+                        logger,
+                        "PRUNE",
+                        f"Survivor: '{node.strategy_label}'{intent_str}",
+                        indent=2,
+                    )
+
+        # Research may still be running if no round reached the judges
+        await self._await_research()
 
         # Find best
         best_node = tree.best_leaf_by_score()
@@ -404,6 +462,8 @@ class DTSEngine:
             )
         logger.info("=" * 60)
 
+        # Pricing was fetched in the background while the search ran
+        await self._pricing_load
         self._token_tracker.print_summary()
 
         # Emit completion event
@@ -417,7 +477,8 @@ class DTSEngine:
             },
         )
 
-        return DTSRunResult(
+        self._tree = tree
+        result = DTSRunResult(
             best_node_id=best_node.id if best_node else None,
             best_score=best_node.stats.aggregated_score if best_node else 0.0,
             best_messages=list(best_node.messages) if best_node else [],
@@ -427,21 +488,27 @@ class DTSEngine:
             total_rounds=rounds,
             research_report=self._research_report,
         )
+        # The finished tree already indexes every node by id
+        result.set_node_index(tree.nodes)
+        return result
 
     def _emit(self, event_type: str, data: dict) -> None:
         """Emit an event if callback is set (fire-and-forget)."""
-        if self._event_callback is not None:
-            asyncio.create_task(emit_event(self._event_callback, event_type, data, logger))
+        self._events.emit(event_type, data)
 
     async def _initialize_tree(self) -> DialogueTree:
         """Initialize tree with root and initial strategy branches."""
         cfg = self.config
 
+        # Messages are never mutated in place (expansion copies the history
+        # before appending), so every initial node can share one instance.
+        first_message = Message.user(cfg.first_message)
+
         # Create root
         root = DialogueNode(
             id=generate_node_id(),
             depth=0,
-            messages=[Message.user(cfg.first_message)],
+            messages=[first_message],
         )
         tree = DialogueTree.create(root)
 
@@ -469,27 +536,22 @@ class DTSEngine:
                     "message": "Conducting deep research on the topic...",
                 },
             )
-        deep_context = await self._get_deep_research_context()
-
-        # Pass research context to evaluator for informed judging
-        if deep_context:
-            self._evaluator.set_research_context(deep_context)
+        if cfg.deep_research and cfg.speculative_strategies:
+            strategies = await self._generate_strategies_speculatively()
+        else:
+            deep_context = await self._get_deep_research_context()
+
+            # Pass research context to evaluator for informed judging
+            if deep_context:
+                self._evaluator.set_research_context(deep_context)
+
+            self._emit_generating_strategies()
+            strategies = await self._generator.generate_strategies(
+                cfg.first_message,
+                cfg.init_branches,
+                deep_context,
+            )
 
-        # Generate strategies
-        log_phase(logger, "INIT", "Generating strategies...", indent=1)
-        self._emit(
-            "phase",
-            {
-                "phase": "generating_strategies",
-                "message": f"Generating {cfg.init_branches} conversation strategies...",
-                "count": cfg.init_branches,
-            },
-        )
-        strategies = await self._generator.generate_strategies(
-            cfg.first_message,
-            cfg.init_branches,
-            deep_context,
-        )
         log_phase(logger, "INIT", f"Generated {len(strategies)} strategies:", indent=1)
 
         for i, strategy in enumerate(strategies, 1):
@@ -509,7 +571,7 @@ class DTSEngine:
             child = DialogueNode(
                 id=generate_node_id(),
                 strategy=strategy,
-                messages=[Message.user(cfg.first_message)],
+                messages=[first_message],
             )
             tree.add_child(root.id, child)
             # Emit node_added for initial strategy branches
@@ -534,6 +596,89 @@ class DTSEngine:
         )
         return tree
 
+    def _emit_generating_strategies(self) -> None:
+        """Log and emit the strategy generation phase."""
+        log_phase(logger, "INIT", "Generating strategies...", indent=1)
+        self._emit(
+            "phase",
+            {
+                "phase": "generating_strategies",
+                "message": f"Generating {self.config.init_branches} conversation strategies...",
+                "count": self.config.init_branches,
+            },
+        )
+
+    async def _generate_strategies_speculatively(self) -> list[Strategy]:
+        """
+        Race deep research against strategy generation without research context.
+
+        If research finishes first, the speculative call is cancelled and
+        strategies are generated with the research context as usual. Otherwise
+        the speculative strategies are kept and research continues in the
+        background until the first judging pass needs it (see _await_research).
+        """
+        cfg = self.config
+        self._emit_generating_strategies()
+
+        research_task = asyncio.create_task(self._get_deep_research_context())
+        speculative_task = asyncio.create_task(
+            self._generator.generate_strategies(cfg.first_message, cfg.init_branches, None)
+        )
+        await asyncio.wait(
+            {research_task, speculative_task},
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+
+        if speculative_task.done() and speculative_task.exception() is None:
+            log_phase(logger, "INIT", "Using strategies generated ahead of research", indent=1)
+            self._research_task = research_task
+            if research_task.done():
+                await self._await_research()
+            return speculative_task.result()
+
+        if speculative_task.done():
+            logger.warning(
+                f"Speculative strategy generation failed, waiting for research: "
+                f"{speculative_task.exception()}"
+            )
+        else:
+            speculative_task.cancel()
+        self._research_task = research_task
+        deep_context = await self._await_research()
+        return await self._generator.generate_strategies(
+            cfg.first_message,
+            cfg.init_branches,
+            deep_context,
+        )
+
+    async def _cancel_research(self) -> None:
+        """Stop background research left over from a run that ended before judging used it."""
+        task, self._research_task = self._research_task, None
+        if task is None:
+            return
+        task.cancel()
+        # Collects the task's own cancellation or error; our own cancellation still propagates
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _cancel_pricing_load(self) -> None:
+        """Settle the background pricing fetch of a run that ended before awaiting it."""
+        task, self._pricing_load = self._pricing_load, None
+        if task is None:
+            return
+        # Only this run's wait is cancelled; the shared fetch itself is shielded
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _await_research(self) -> str | None:
+        """Wait for background deep research and hand its context to the judges."""
+        task, self._research_task = self._research_task, None
+        if task is None:
+            return None
+        deep_context = await task
+        if deep_context:
+            self._evaluator.set_research_context(deep_context)
+        return deep_context
+
     def _prune(
         self,
         nodes: list[DialogueNode],
@@ -545,40 +690,38 @@ class DTSEngine:
         if not nodes:
             return []
 
+        # One lookup per node; None marks a node whose scoring failed
+        scored = [(scores.get(n.id), n) for n in nodes]
+        by_score = itemgetter(0)
+
         # Threshold filter
-        survivors = [
-            n
-            for n in nodes
-            if n.id in scores and scores[n.id].aggregated_score >= cfg.prune_threshold
+        ranked = [
+            (s.aggregated_score, n)
+            for s, n in scored
+            if s is not None and s.aggregated_score >= cfg.prune_threshold
         ]
 
-        # Top-K cap
-        if cfg.keep_top_k and len(survivors) > cfg.keep_top_k:
-            survivors.sort(
-                key=lambda n: scores[n.id].aggregated_score,
-                reverse=True,
-            )
-            survivors = survivors[: cfg.keep_top_k]
-
-        # Min survivors
-        if len(survivors) < cfg.min_survivors:
-            ranked = sorted(
-                nodes,
-                key=lambda n: scores.get(
-                    n.id, AggregatedScore.zero(cfg.prune_threshold)
-                ).aggregated_score,
-                reverse=True,
+        # Top-K cap (nlargest is a stable partial sort, same order as a full sort)
+        if cfg.keep_top_k and len(ranked) > cfg.keep_top_k:
+            ranked = heapq.nlargest(cfg.keep_top_k, ranked, key=by_score)
+
+        # Min survivors; unscored nodes rank as zero
+        if len(ranked) < cfg.min_survivors:
+            ranked = heapq.nlargest(
+                cfg.min_survivors,
+                [(s.aggregated_score if s is not None else 0.0, n) for s, n in scored],
+                key=by_score,
             )
-            survivors = ranked[: cfg.min_survivors]
+
+        survivors = [n for _, n in ranked]
 
         # Mark pruned
         survivor_ids = {n.id for n in survivors}
-        for n in nodes:
+        for s, n in scored:
             if n.id not in survivor_ids:
                 n.status = NodeStatus.PRUNED
-                score = scores.get(n.id)
-                if score:
-                    n.prune_reason = f"score {score.aggregated_score:.1f} < {cfg.prune_threshold}"
+                if s is not None:
+                    n.prune_reason = f"score {s.aggregated_score:.1f} < {cfg.prune_threshold}"
                 else:
                     n.prune_reason = "scoring failed"
 
@@ -600,25 +743,18 @@ class DTSEngine:
         """Track external research costs (from GPT Researcher)."""
         self._token_tracker.research_cost_usd += cost_usd
 
+    def _track_cache_hit(self) -> None:
+        """Count a judge call answered from the evaluator's response cache."""
+        self._token_tracker.cached_calls += 1
+
     def _track_usage(self, completion: Completion, phase: str) -> None:
         """Track token usage by phase and model."""
         if not completion.usage:
             return
-
-        # Map phase names to TokenTracker attribute names
-        phase_map = {
-            "strategy": "strategy_generation",
-            "intent": "intent_generation",
-            "user": "user_simulation",
-            "assistant": "assistant_generation",
-            "judge": "judging",
-        }
-
-        tracker_phase = phase_map.get(phase, phase)
         model = completion.model or self._token_tracker.model_name
-        self._token_tracker.add_usage(model, completion.usage, tracker_phase)
+        self._token_tracker.add_usage(model, completion.usage, _USAGE_PHASES.get(phase, phase))
 
     @property
     def tree(self) -> DialogueTree | None:
-        """Get the current tree (available after run())."""
+        """Get the tree from the last completed run (None if it failed)."""
         return self._tree
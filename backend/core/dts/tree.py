@@ -80,12 +80,12 @@ class DialogueTree(BaseModel):
 
     def active_nodes(self) -> list[DialogueNode]:
         """Get all active (non-pruned, non-error) nodes."""
-        return [n for n in self.nodes.values() if n.status == NodeStatus.ACTIVE]
+        return [n for n in self.nodes.values() if n.status is NodeStatus.ACTIVE]
 
     def active_leaves(self) -> list[DialogueNode]:
         """Get all active leaf nodes (nodes with no children)."""
         return [
-            n for n in self.nodes.values() if n.status == NodeStatus.ACTIVE and len(n.children) == 0
+            n for n in self.nodes.values() if n.status is NodeStatus.ACTIVE and len(n.children) == 0
         ]
 
     def leaves_at_depth(self, depth: int) -> list[DialogueNode]:
@@ -114,9 +114,7 @@ class DialogueTree(BaseModel):
         current_id: str | None = node_id
         while current_id is not None:
             node = self.get(current_id)
-            node.stats.visits += 1
-            node.stats.value_sum += score
-            node.stats.value_mean = node.stats.value_sum / node.stats.visits
+            node.stats.record_visit(score)
             current_id = node.parent_id
 
     def prune_node(self, node_id: str, reason: str | None = None) -> None:
@@ -131,27 +129,25 @@ class DialogueTree(BaseModel):
         Returns the number of nodes pruned.
         """
         count = 0
-
-        def _prune_recursive(nid: str) -> None:
-            nonlocal count
-            node = self.get(nid)
-            if node.status != NodeStatus.PRUNED:
+        stack = [node_id]
+        while stack:
+            node = self.get(stack.pop())
+            if node.status is not NodeStatus.PRUNED:
                 node.status = NodeStatus.PRUNED
                 node.prune_reason = reason
                 count += 1
-            for child_id in node.children:
-                _prune_recursive(child_id)
-
-        _prune_recursive(node_id)
+            stack.extend(node.children)
         return count
 
     def descendants(self, node_id: str) -> Iterator[DialogueNode]:
         """Iterate over all descendants of a node (not including the node itself)."""
-        node = self.get(node_id)
-        for child_id in node.children:
-            child = self.get(child_id)
+        # Explicit stack instead of nested generators: each yield is O(1)
+        # rather than O(depth), and deep trees cannot hit the recursion limit.
+        stack = list(reversed(self.get(node_id).children))
+        while stack:
+            child = self.get(stack.pop())
             yield child
-            yield from self.descendants(child_id)
+            stack.extend(reversed(child.children))
 
     def subtree_size(self, node_id: str) -> int:
         """Get the number of nodes in the subtree rooted at node_id (including the node)."""
@@ -178,17 +174,24 @@ class DialogueTree(BaseModel):
         return max(leaves, key=lambda n: n.stats.aggregated_score)
 
     def statistics(self) -> dict:
-        """Get tree statistics."""
-        all_nodes = list(self.nodes.values())
-        active = [n for n in all_nodes if n.status == NodeStatus.ACTIVE]
-        pruned = [n for n in all_nodes if n.status == NodeStatus.PRUNED]
-        leaves = self.active_leaves()
+        """Get tree statistics (single pass over the nodes)."""
+        active = pruned = leaves = visits = max_depth = 0
+        for n in self.nodes.values():
+            visits += n.stats.visits
+            if n.depth > max_depth:
+                max_depth = n.depth
+            if n.status is NodeStatus.ACTIVE:
+                active += 1
+                if not n.children:
+                    leaves += 1
+            elif n.status is NodeStatus.PRUNED:
+                pruned += 1
 
         return {
-            "total_nodes": len(all_nodes),
-            "active_nodes": len(active),
-            "pruned_nodes": len(pruned),
-            "active_leaves": len(leaves),
-            "max_depth": self.max_depth(),
-            "total_visits": sum(n.stats.visits for n in all_nodes),
+            "total_nodes": len(self.nodes),
+            "active_nodes": active,
+            "pruned_nodes": pruned,
+            "active_leaves": leaves,
+            "max_depth": max_depth,
+            "total_visits": visits,
         }
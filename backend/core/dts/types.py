@@ -2,48 +2,210 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
-import urllib.request
+import os
+import sys
+import time
+from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
+from operator import attrgetter, is_, itemgetter
 from pathlib import Path
+from types import MappingProxyType
 from typing import Literal
 
-from pydantic import BaseModel, Field
+import httpx
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
+from backend.core.dts.utils import format_message_history
 from backend.llm.types import Message, Usage
+from backend.utils.config import config
 from backend.utils.logging import logger
 
+try:
+    import orjson
+except ImportError:  # optional: faster result serialization
+    orjson = None
 
-@dataclass
+_ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+_role_and_content = attrgetter("role", "content")
+
+
+def _trajectory(messages: list[Message]) -> list[dict]:
+    """Convert messages to the role/content dicts used in exported results."""
+    return [
+        {"role": role, "content": content} for role, content in map(_role_and_content, messages)
+    ]
+
+
+def _json_bytes(obj: object, level: int = 0) -> bytes:
+    """Encode obj as 2-space indented JSON, nested ``level`` levels deep."""
+    if orjson is not None:
+        encoded = orjson.dumps(obj, option=_ORJSON_OPTIONS)
+    else:
+        encoded = json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    # Raw newlines only occur between tokens (string newlines are escaped)
+    return encoded.replace(b"\n", b"\n" + b"  " * level) if level else encoded
+
+
+@dataclass(frozen=True, slots=True)
 class ModelPricing:
     """Pricing per 1M tokens for a model."""
 
     model_name: str
     input_cost_per_million: float  # $ per 1M input tokens
     output_cost_per_million: float  # $ per 1M output tokens
+    # Prompt-cache rates; None means the provider doesn't price them separately
+    # and they are billed as regular input
+    cached_input_cost_per_million: float | None = None  # $ per 1M cache-read tokens
+    cache_write_cost_per_million: float | None = None  # $ per 1M cache-write tokens
+
+    # Per-token rates, derived once so calculate_cost is a few multiplies
+    _input_per_token: float = field(init=False, repr=False, compare=False)
+    _output_per_token: float = field(init=False, repr=False, compare=False)
+    _cached_per_token: float = field(init=False, repr=False, compare=False)
+    _write_per_token: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        input_per_token = self.input_cost_per_million / 1_000_000
+        object.__setattr__(self, "_input_per_token", input_per_token)
+        object.__setattr__(self, "_output_per_token", self.output_cost_per_million / 1_000_000)
+        cached, write = self.cached_input_cost_per_million, self.cache_write_cost_per_million
+        object.__setattr__(
+            self, "_cached_per_token", input_per_token if cached is None else cached / 1_000_000
+        )
+        object.__setattr__(
+            self, "_write_per_token", input_per_token if write is None else write / 1_000_000
+        )
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
-        """Calculate total cost in dollars."""
-        input_cost = (input_tokens / 1_000_000) * self.input_cost_per_million
-        output_cost = (output_tokens / 1_000_000) * self.output_cost_per_million
-        return input_cost + output_cost
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0,
+    ) -> float:
+        """
+        Calculate total cost in dollars.
+
+        Cache reads and writes are part of input_tokens (as in OpenAI-style
+        usage); they are billed at their own rates instead of the input rate.
+        """
+        uncached = input_tokens - cached_input_tokens - cache_write_tokens
+        return (
+            uncached * self._input_per_token
+            + cached_input_tokens * self._cached_per_token
+            + cache_write_tokens * self._write_per_token
+            + output_tokens * self._output_per_token
+        )
+
+    def cost_of(self, stats: TokenStats) -> float:
+        """Calculate the cost of accumulated token stats in dollars."""
+        return self.calculate_cost(
+            stats.input_tokens,
+            stats.output_tokens,
+            stats.cached_input_tokens,
+            stats.cache_write_tokens,
+        )
 
 
 # Pricing cache - populated dynamically from OpenRouter API
 _pricing_cache: dict[str, ModelPricing] = {}
 _pricing_loaded: bool = False
 
+# Bumped whenever _pricing_cache changes, so derived costs know to recompute
+_pricing_version: int = 0
 
-def _load_pricing_from_openrouter() -> None:
-    """Fetch model pricing from OpenRouter API and cache it."""
-    global _pricing_cache, _pricing_loaded
-    if _pricing_loaded:
+# Zero-cost stand-ins for models missing from the catalog (one per model)
+_unknown_pricing: dict[str, ModelPricing] = {}
+
+# In-flight pricing fetch shared by concurrent callers (single-flight)
+_pricing_task: asyncio.Task[None] | None = None
+
+# Whether the on-disk pricing cache has been consulted this process
+_pricing_disk_checked: bool = False
+
+OPENROUTER_MODELS_URL = "https://openrouter.ai/api/v1/models"
+
+
+def _read_pricing_file() -> bool:
+    """
+    Populate the pricing cache from the on-disk copy of the catalog.
+
+    Returns:
+        True if the file was loaded and is younger than the configured TTL.
+        Stale data is still loaded (and used) so lookups never wait on the network.
+    """
+    global _pricing_disk_checked, _pricing_version
+    _pricing_disk_checked = True
+    path = Path(config.pricing_cache_path)
+    try:
+        age = time.time() - path.stat().st_mtime
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for model_id, costs in data.items():
+            _pricing_cache[model_id] = ModelPricing(model_id, *costs)
+        _pricing_version += 1
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable pricing cache {path}: {e}")
+        return False
+    return age < config.pricing_cache_ttl
+
+
+def _write_pricing_file() -> None:
+    """Persist the pricing cache atomically (temp file + rename)."""
+    path = Path(config.pricing_cache_path)
+    data = {
+        model_id: [
+            p.input_cost_per_million,
+            p.output_cost_per_million,
+            p.cached_input_cost_per_million,
+            p.cache_write_cost_per_million,
+        ]
+        for model_id, p in _pricing_cache.items()
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Failed to write pricing cache {path}: {e}")
+
+
+def _start_pricing_load(loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Begin loading pricing on ``loop`` unless a load is already in flight there.
+
+    A fresh disk cache completes the load immediately. A stale one is served
+    right away while a background fetch refreshes it.
+    """
+    global _pricing_loaded, _pricing_task
+    if _pricing_task is not None and _pricing_task.get_loop() is loop:
         return
+    if not _pricing_disk_checked:
+        fresh = _read_pricing_file()
+        if _pricing_cache:
+            _pricing_loaded = True
+            if fresh:
+                return
+    _pricing_task = loop.create_task(_fetch_pricing_from_openrouter())
 
+
+async def _fetch_pricing_from_openrouter() -> None:
+    """Fetch model pricing from OpenRouter API and cache it."""
+    global _pricing_loaded, _pricing_version
     try:
-        with urllib.request.urlopen("https://openrouter.ai/api/v1/models", timeout=10) as response:
-            data = json.loads(response.read().decode())
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(OPENROUTER_MODELS_URL)
+            response.raise_for_status()
+            # Parse the raw bytes directly (no intermediate str) when orjson is available
+            data = orjson.loads(response.content) if orjson else response.json()
 
         for model in data.get("data", []):
             model_id = model.get("id", "")
@@ -52,34 +214,102 @@ def _load_pricing_from_openrouter() -> None:
             # OpenRouter returns price per token, convert to per million
             prompt_per_token = float(pricing.get("prompt", 0))
             completion_per_token = float(pricing.get("completion", 0))
+            cache_read = pricing.get("input_cache_read")
+            cache_write = pricing.get("input_cache_write")
 
             _pricing_cache[model_id] = ModelPricing(
                 model_name=model_id,
                 input_cost_per_million=prompt_per_token * 1_000_000,
                 output_cost_per_million=completion_per_token * 1_000_000,
+                cached_input_cost_per_million=(
+                    float(cache_read) * 1_000_000 if cache_read is not None else None
+                ),
+                cache_write_cost_per_million=(
+                    float(cache_write) * 1_000_000 if cache_write is not None else None
+                ),
             )
 
-        _pricing_loaded = True
         logger.debug(f"Loaded pricing for {len(_pricing_cache)} models from OpenRouter")
+        _pricing_version += 1
+        _lookup_pricing.cache_clear()
+        _write_pricing_file()
 
     except Exception as e:
         logger.warning(f"Failed to load pricing from OpenRouter: {e}")
-        _pricing_loaded = True  # Don't retry on failure
+
+    _pricing_loaded = True  # Don't retry on failure
+
+
+async def load_pricing() -> None:
+    """
+    Load OpenRouter pricing without blocking the event loop.
+
+    Concurrent callers on the same loop share a single in-flight request.
+    """
+    if _pricing_loaded:
+        return
+    _start_pricing_load(asyncio.get_running_loop())
+    if not _pricing_loaded and _pricing_task is not None:
+        await asyncio.shield(_pricing_task)
+
+
+async def _load_pricing_inline() -> None:
+    """
+    Load pricing, also finishing a stale-cache refresh before returning.
+
+    For a loop that closes right after (asyncio.run), where a background
+    refresh would be cancelled and never land.
+    """
+    await load_pricing()
+    if _pricing_task is not None and not _pricing_task.done():
+        await _pricing_task
+
+
+def _load_pricing_from_openrouter() -> bool:
+    """
+    Ensure pricing is loaded from synchronous code.
+
+    Returns:
+        True if pricing is loaded. Inside a running event loop the fetch is
+        scheduled instead of blocking, and False is returned until it lands;
+        async callers should await load_pricing() first.
+    """
+    if _pricing_loaded:
+        return True
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(_load_pricing_inline())
+        return True
+    # Runs in the background; the result is picked up by later lookups
+    _start_pricing_load(loop)
+    return _pricing_loaded
 
 
 def get_model_pricing(model_name: str) -> ModelPricing:
     """Get pricing for a model, fetching from OpenRouter if needed."""
-    _load_pricing_from_openrouter()
+    if not _load_pricing_from_openrouter():
+        # Pricing still loading; don't cache or warn about a provisional zero
+        return ModelPricing(model_name, 0.0, 0.0)
+    return _lookup_pricing(model_name)
+
 
-    if model_name in _pricing_cache:
-        return _pricing_cache[model_name]
+@lru_cache(maxsize=512)
+def _lookup_pricing(model_name: str) -> ModelPricing:
+    """Resolve pricing from the loaded catalog (memoized; cleared on refresh)."""
+    pricing = _pricing_cache.get(model_name)
+    if pricing is not None:
+        return pricing
 
-    # Return zero pricing for unknown models with a warning
-    logger.warning(f"No pricing found for model '{model_name}' - cost will be $0")
-    return ModelPricing(model_name, 0.0, 0.0)
+    # Return zero pricing for unknown models, warning only the first time
+    pricing = _unknown_pricing.get(model_name)
+    if pricing is None:
+        logger.warning(f"No pricing found for model '{model_name}' - cost will be $0")
+        pricing = _unknown_pricing[model_name] = ModelPricing(model_name, 0.0, 0.0)
+    return pricing
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenStats:
     """Token usage statistics."""
 
@@ -87,14 +317,24 @@ class TokenStats:
     output_tokens: int = 0
     total_tokens: int = 0
     request_count: int = 0
+    cached_input_tokens: int = 0  # Subset of input_tokens read from the prompt cache
+    cache_write_tokens: int = 0  # Subset of input_tokens written to the prompt cache
+
+    # Aggregate that mirrors every update (keeps tracker totals O(1))
+    _parent: TokenStats | None = field(default=None, init=False, repr=False, compare=False)
 
     def add(self, usage: Usage | None) -> None:
         """Add usage from a completion."""
-        if usage:
-            self.input_tokens += usage.prompt_tokens
-            self.output_tokens += usage.completion_tokens
-            self.total_tokens += usage.total_tokens
-            self.request_count += 1
+        if usage is None:
+            return
+        self.input_tokens += usage.prompt_tokens
+        self.output_tokens += usage.completion_tokens
+        self.total_tokens += usage.total_tokens
+        self.request_count += 1
+        self.cached_input_tokens += usage.cached_tokens
+        self.cache_write_tokens += usage.cache_write_tokens
+        if self._parent is not None:
+            self._parent.add(usage)
 
     def merge(self, other: TokenStats) -> None:
         """Merge another TokenStats into this one."""
@@ -102,6 +342,10 @@ class TokenStats:
         self.output_tokens += other.output_tokens
         self.total_tokens += other.total_tokens
         self.request_count += other.request_count
+        self.cached_input_tokens += other.cached_input_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+        if self._parent is not None:
+            self._parent.merge(other)
 
 
 # Phase names used for token tracking
@@ -114,8 +358,21 @@ TOKEN_PHASES = (
     "research",
 )
 
+# Display names and row template for print_summary (built once, not per call)
+_PHASE_DISPLAY = MappingProxyType(
+    {
+        "strategy_generation": "Strategy Generation",
+        "intent_generation": "Intent Generation",
+        "user_simulation": "User Simulation",
+        "assistant_generation": "Assistant Generation",
+        "judging": "Judging",
+        "research": "Research",
+    }
+)
+_PHASE_ROW = "  {name:<22} | {reqs:>4} reqs | {inp:>8,} in | {out:>8,} out".format
+
 
-@dataclass
+@dataclass(slots=True)
 class TokenTracker:
     """
     Tracks token usage and costs across a DTS run.
@@ -134,74 +391,130 @@ class TokenTracker:
     research: TokenStats = field(default_factory=TokenStats)
 
     # Per-model tracking for accurate cost calculation
-    by_model: dict[str, TokenStats] = field(default_factory=dict)
+    by_model: defaultdict[str, TokenStats] = field(default_factory=lambda: defaultdict(TokenStats))
 
     # External costs (e.g., GPT Researcher uses its own LLM client)
     research_cost_usd: float = 0.0
 
+    # Judge calls answered from the evaluator's response cache (no request made)
+    cached_calls: int = 0
+
+    # Phase name -> the per-phase field above, in TOKEN_PHASES order
+    phases: dict[str, TokenStats] = field(init=False, repr=False)
+
+    # Pricing resolved once per model
+    _pricing: dict[str, ModelPricing] = field(init=False, repr=False, default_factory=dict)
+
+    # Running totals across all phases, fed by each phase's TokenStats
+    _totals: TokenStats = field(init=False, repr=False, default_factory=TokenStats)
+
+    # Running model cost, valid while _cost_version matches _pricing_version
+    # (-1 forces a recompute, e.g. after usage was added before pricing loaded)
+    _cost: float = field(init=False, repr=False, default=0.0)
+    _cost_version: int = field(init=False, repr=False, default=-1)
+    _memo_version: int = field(init=False, repr=False, default=-1)
+
+    def __post_init__(self) -> None:
+        self.phases = {phase: getattr(self, phase) for phase in TOKEN_PHASES}
+        for stats in self.phases.values():
+            self._totals.merge(stats)
+            stats._parent = self._totals
+
     def add_usage(self, model: str, usage: Usage | None, phase: str) -> None:
         """Track usage for a specific model and phase."""
-        if not usage:
+        if usage is None:
             return
 
         # Track by phase
-        phase_stats = getattr(self, phase.replace("-", "_"), None)
-        if isinstance(phase_stats, TokenStats):
+        phase_stats = self.phases.get(phase.replace("-", "_"))
+        if phase_stats is not None:
             phase_stats.add(usage)
 
         # Track by model for accurate cost calculation
-        if model not in self.by_model:
-            self.by_model[model] = TokenStats()
         self.by_model[model].add(usage)
 
+        if self._cost_version == _pricing_version and _pricing_loaded:
+            pricing = self._pricing_for(model)
+            self._cost += pricing.calculate_cost(
+                usage.prompt_tokens,
+                usage.completion_tokens,
+                usage.cached_tokens,
+                usage.cache_write_tokens,
+            )
+        else:
+            self._cost_version = -1
+
     def get_pricing(self) -> ModelPricing:
         """Get pricing for the primary model (fetched from OpenRouter API)."""
-        return get_model_pricing(self.model_name)
+        return self._pricing_for(self.model_name)
+
+    def _pricing_for(self, model_name: str) -> ModelPricing:
+        """Get pricing for a model, looking it up only on first use."""
+        if self._memo_version != _pricing_version:
+            self._pricing.clear()
+            self._memo_version = _pricing_version
+        pricing = self._pricing.get(model_name)
+        if pricing is None:
+            pricing = get_model_pricing(model_name)
+            if _pricing_loaded:
+                self._pricing[model_name] = pricing
+        return pricing
 
     @property
     def total_input_tokens(self) -> int:
         """Total input tokens across all phases."""
-        return sum(getattr(self, phase).input_tokens for phase in TOKEN_PHASES)
+        return self._totals.input_tokens
 
     @property
     def total_output_tokens(self) -> int:
         """Total output tokens across all phases."""
-        return sum(getattr(self, phase).output_tokens for phase in TOKEN_PHASES)
+        return self._totals.output_tokens
 
     @property
     def total_tokens(self) -> int:
         """Total tokens across all phases."""
-        return self.total_input_tokens + self.total_output_tokens
+        return self._totals.input_tokens + self._totals.output_tokens
+
+    @property
+    def total_cached_input_tokens(self) -> int:
+        """Total input tokens served from the prompt cache."""
+        return self._totals.cached_input_tokens
 
     @property
     def total_requests(self) -> int:
         """Total LLM requests made."""
-        return sum(getattr(self, phase).request_count for phase in TOKEN_PHASES)
+        return self._totals.request_count
 
     @property
     def total_cost(self) -> float:
         """Total cost in dollars (calculated per-model for accuracy)."""
-        total = 0.0
-        for model_name, stats in self.by_model.items():
-            pricing = get_model_pricing(model_name)
-            total += pricing.calculate_cost(stats.input_tokens, stats.output_tokens)
-        return total + self.research_cost_usd
+        if self._cost_version != _pricing_version or not _pricing_loaded:
+            total = 0.0
+            for model_name, stats in self.by_model.items():
+                total += self._pricing_for(model_name).cost_of(stats)
+            self._cost = total
+            self._cost_version = _pricing_version if _pricing_loaded else -1
+        return self._cost + self.research_cost_usd
 
     def to_dict(self) -> dict:
         """Convert to dictionary for serialization."""
         # Build per-model breakdown
         by_model_dict = {}
         for model_name, stats in self.by_model.items():
-            pricing = get_model_pricing(model_name)
-            cost = pricing.calculate_cost(stats.input_tokens, stats.output_tokens)
+            pricing = self._pricing_for(model_name)
+            cost = pricing.cost_of(stats)
             by_model_dict[model_name] = {
                 "input_tokens": stats.input_tokens,
                 "output_tokens": stats.output_tokens,
+                "cached_input_tokens": stats.cached_input_tokens,
+                "cache_write_tokens": stats.cache_write_tokens,
                 "requests": stats.request_count,
                 "cost_usd": round(cost, 6),
                 "pricing": {
                     "input_per_million": pricing.input_cost_per_million,
                     "output_per_million": pricing.output_cost_per_million,
+                    "cached_input_per_million": pricing.cached_input_cost_per_million,
+                    "cache_write_per_million": pricing.cache_write_cost_per_million,
                 },
             }
 
@@ -211,7 +524,9 @@ class TokenTracker:
                 "input_tokens": self.total_input_tokens,
                 "output_tokens": self.total_output_tokens,
                 "total_tokens": self.total_tokens,
+                "cached_input_tokens": self.total_cached_input_tokens,
                 "total_requests": self.total_requests,
+                "cached_calls": self.cached_calls,
                 "total_cost_usd": round(self.total_cost, 6),
             },
             "by_model": by_model_dict,
@@ -221,8 +536,7 @@ class TokenTracker:
     def _build_phase_dict(self) -> dict[str, dict]:
         """Build per-phase statistics dictionary."""
         result = {}
-        for phase in TOKEN_PHASES:
-            stats: TokenStats = getattr(self, phase)
+        for phase, stats in self.phases.items():
             phase_data = {
                 "input_tokens": stats.input_tokens,
                 "output_tokens": stats.output_tokens,
@@ -235,68 +549,83 @@ class TokenTracker:
 
     def print_summary(self) -> None:
         """Print a formatted summary of token usage and costs."""
-        print("\n" + "=" * 60)
-        print("TOKEN USAGE & COST SUMMARY")
-        print("=" * 60)
+        # Price each model once; the total reuses the per-model costs
+        model_rows = []
+        for model_name, stats in self.by_model.items():
+            pricing = self._pricing_for(model_name)
+            cost = pricing.cost_of(stats)
+            model_rows.append((model_name, stats, pricing, cost))
+        total_cost = sum(row[3] for row in model_rows) + self.research_cost_usd
+        totals = self._totals
+
+        lines = ["", "=" * 60, "TOKEN USAGE & COST SUMMARY", "=" * 60]
 
         # Show models used
-        models_used = list(self.by_model.keys())
-        if models_used:
-            print(f"Models: {', '.join(models_used)}")
+        if model_rows:
+            lines.append(f"Models: {', '.join(self.by_model)}")
         else:
-            print(f"Model: {self.model_name}")
-        print("-" * 60)
+            lines.append(f"Model: {self.model_name}")
+        lines.append("-" * 60)
 
         # Totals
-        print(f"{'Total Input Tokens:':<30} {self.total_input_tokens:>15,}")
-        print(f"{'Total Output Tokens:':<30} {self.total_output_tokens:>15,}")
-        print(f"{'Total Tokens:':<30} {self.total_tokens:>15,}")
-        print(f"{'Total Requests:':<30} {self.total_requests:>15}")
-        print(f"{'TOTAL COST:':<30} ${self.total_cost:>14.6f}")
-        print("-" * 60)
+        lines += [
+            f"{'Total Input Tokens:':<30} {totals.input_tokens:>15,}",
+            f"{'Total Output Tokens:':<30} {totals.output_tokens:>15,}",
+            f"{'Total Tokens:':<30} {totals.input_tokens + totals.output_tokens:>15,}",
+        ]
+        if totals.cached_input_tokens:
+            lines.append(f"{'Cached Input Tokens:':<30} {totals.cached_input_tokens:>15,}")
+        lines.append(f"{'Total Requests:':<30} {totals.request_count:>15}")
+        if self.cached_calls:
+            lines.append(f"{'Cached Judge Calls:':<30} {self.cached_calls:>15}")
+        lines += [
+            f"{'TOTAL COST:':<30} ${total_cost:>14.6f}",
+            "-" * 60,
+        ]
 
         # Per-model breakdown
-        if self.by_model:
-            print("\nBy Model:")
-            for model_name, stats in self.by_model.items():
-                pricing = get_model_pricing(model_name)
-                model_cost = pricing.calculate_cost(stats.input_tokens, stats.output_tokens)
-                print(f"  {model_name:<35} | {stats.request_count:>4} reqs | ${model_cost:.4f}")
-                print(
+        if model_rows:
+            lines += ["", "By Model:"]
+            for model_name, stats, pricing, cost in model_rows:
+                lines.append(f"  {model_name:<35} | {stats.request_count:>4} reqs | ${cost:.4f}")
+                lines.append(
                     f"    Pricing: ${pricing.input_cost_per_million:.2f}/1M in, "
                     f"${pricing.output_cost_per_million:.2f}/1M out"
                 )
 
         # Per-phase breakdown
-        print("\nBy Phase:")
-        phase_names = {
-            "strategy_generation": "Strategy Generation",
-            "intent_generation": "Intent Generation",
-            "user_simulation": "User Simulation",
-            "assistant_generation": "Assistant Generation",
-            "judging": "Judging",
-            "research": "Research",
-        }
-        for phase in TOKEN_PHASES:
-            stats: TokenStats = getattr(self, phase)
+        lines += ["", "By Phase:"]
+        for phase, stats in self.phases.items():
             if stats.request_count > 0:
-                print(
-                    f"  {phase_names[phase]:<22} | {stats.request_count:>4} reqs | "
-                    f"{stats.input_tokens:>8,} in | {stats.output_tokens:>8,} out"
+                lines.append(
+                    _PHASE_ROW(
+                        name=_PHASE_DISPLAY[phase],
+                        reqs=stats.request_count,
+                        inp=stats.input_tokens,
+                        out=stats.output_tokens,
+                    )
                 )
 
         # External research cost (GPT Researcher uses its own LLM)
         if self.research_cost_usd > 0:
-            print(
+            lines.append(
                 f"  {'Research (external)':<22} | {'N/A':>4} reqs | "
                 f"{'N/A':>8} in | {'N/A':>8} out | "
                 f"${self.research_cost_usd:.4f}"
             )
-        print("=" * 60)
+        lines.append("=" * 60)
 
+        # One write instead of a print() per line
+        sys.stdout.write("\n".join(lines) + "\n")
 
-class NodeStatus(str, Enum):
-    """Status of a tree node."""
+
+class NodeStatus(Enum):
+    """
+    Status of a tree node.
+
+    A plain (non-str) Enum: members are singletons compared by identity, and
+    exports go through ``.value`` explicitly.
+    """
 
     ACTIVE = "active"
     PRUNED = "pruned"
@@ -304,14 +633,21 @@ class NodeStatus(str, Enum):
     ERROR = "error"
 
 
-class Strategy(BaseModel):
+# In-memory tree objects are slotted dataclasses: they are created in bulk during
+# search from already-validated values, so pydantic validation only costs time and
+# a per-instance __dict__. LLM I/O models below remain pydantic.
+
+
+@dataclass(slots=True, kw_only=True)
+class Strategy:
     """A conversation strategy for branch exploration."""
 
     tagline: str
     description: str
 
 
-class UserIntent(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class UserIntent:
     """A specific user response intent for branch forking."""
 
     id: str
@@ -322,6 +658,12 @@ class UserIntent(BaseModel):
     )
     cognitive_stance: str  # accepting, questioning, challenging, exploring, withdrawing
 
+    def __post_init__(self) -> None:
+        # Tone and stance come from small vocabularies but are parsed fresh from
+        # every intent response; intern them so all intents share one copy.
+        self.emotional_tone = sys.intern(self.emotional_tone)
+        self.cognitive_stance = sys.intern(self.cognitive_stance)
+
 
 class CriterionScore(BaseModel):
     """Score for a single evaluation criterion."""
@@ -358,10 +700,38 @@ class AggregatedScore(BaseModel):
     pass_votes: int = Field(ge=0, le=3)  # count of scores >= threshold
     passed: bool  # True if pass_votes >= 2
 
+    @classmethod
+    def from_scores(
+        cls, scores: tuple[float, float, float] | list[float], threshold: float = 5.0
+    ) -> AggregatedScore:
+        """
+        Build from exactly 3 judge scores without pydantic validation.
+
+        Args:
+            scores: The 3 judge scores (0-10 scale).
+            threshold: Score threshold for a pass vote.
+
+        Returns:
+            AggregatedScore with the median and majority pass/fail.
+        """
+        a, b, c = scores
+        # Median of 3 with comparisons only (exact, unlike a + b + c - min - max)
+        if a > b:
+            a, b = b, a
+        median = max(a, min(b, c))
+        pass_votes = (a >= threshold) + (b >= threshold) + (c >= threshold)
+        return cls.model_construct(
+            individual_scores=list(scores),
+            aggregated_score=median,
+            pass_threshold=threshold,
+            pass_votes=pass_votes,
+            passed=pass_votes >= 2,
+        )
+
     @classmethod
     def zero(cls, threshold: float = 5.0) -> AggregatedScore:
         """Create a zero score for error/fallback cases."""
-        return cls(
+        return cls.model_construct(
             individual_scores=[0.0, 0.0, 0.0],
             aggregated_score=0.0,
             pass_threshold=threshold,
@@ -370,26 +740,36 @@ class AggregatedScore(BaseModel):
         )
 
 
-class NodeStats(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class NodeStats:
     """Statistics for a dialogue node."""
 
     visits: int = 0
     value_sum: float = 0.0
     value_mean: float = 0.0
-    judge_scores: list[float] = Field(default_factory=list)
+    judge_scores: list[float] = field(default_factory=list)
     aggregated_score: float = 0.0
     # Critique from comparative judging
-    critiques: dict[str, list[str] | str] = Field(
+    critiques: dict[str, list[str] | str] = field(
         default_factory=dict
     )  # {weaknesses: [], strengths: [], key_moment: ""}
 
+    def record_visit(self, value: float) -> None:
+        """Count a visit and fold its value into the running sum and mean."""
+        visits = self.visits + 1
+        value_sum = self.value_sum + value
+        self.visits = visits
+        self.value_sum = value_sum
+        self.value_mean = value_sum / visits
 
-class DialogueNode(BaseModel):
+
+@dataclass(slots=True, kw_only=True)
+class DialogueNode:
     """A node in the dialogue tree representing a conversation state."""
 
     id: str
     parent_id: str | None = None
-    children: list[str] = Field(default_factory=list)
+    children: list[str] = field(default_factory=list)
     depth: int = 0
     status: NodeStatus = NodeStatus.ACTIVE
 
@@ -400,15 +780,18 @@ class DialogueNode(BaseModel):
     user_intent: UserIntent | None = None
 
     # Conversation trajectory to this node
-    messages: list[Message] = Field(default_factory=list)
+    messages: list[Message] = field(default_factory=list)
 
     # Statistics for scoring
-    stats: NodeStats = Field(default_factory=NodeStats)
+    stats: NodeStats = field(default_factory=NodeStats)
 
     # Pruning metadata
     prune_reason: str | None = None
 
-    model_config = {"arbitrary_types_allowed": True}
+    # Memo for history_text(): the message list it was built from and its length
+    _history_src: list[Message] | None = field(default=None, init=False, repr=False, compare=False)
+    _history_len: int = field(default=0, init=False, repr=False, compare=False)
+    _history_text: str = field(default="", init=False, repr=False, compare=False)
 
     @property
     def strategy_label(self) -> str:
@@ -420,6 +803,26 @@ class DialogueNode(BaseModel):
         """Get user intent label or None."""
         return self.user_intent.label if self.user_intent else None
 
+    def history_text(self) -> str:
+        """
+        Get the messages formatted with format_message_history (memoized).
+
+        Histories only ever grow by appending to a copy, so when the messages
+        still start with the memoized ones only the new tail is formatted.
+        """
+        messages, src, n = self.messages, self._history_src, self._history_len
+        if messages is src and len(messages) == n:
+            return self._history_text
+        if src is not None and 0 < n <= len(messages) and all(map(is_, messages[:n], src)):
+            tail = messages[n:]
+            text = self._history_text
+            if tail:
+                text = f"{text}\n\n{format_message_history(tail)}"
+        else:
+            text = format_message_history(messages)
+        self._history_src, self._history_len, self._history_text = messages, len(messages), text
+        return text
+
     def update_with_evaluation(self, score: AggregatedScore, critiques: dict | None = None) -> None:
         """Update node stats with evaluation results."""
         self.stats.judge_scores = score.individual_scores
@@ -432,9 +835,17 @@ class TreeGeneratorOutput(BaseModel):
     """Parsed output from conversation_tree_generator prompt."""
 
     goal: str
-    nodes: dict[str, str]  # tagline -> description
+    nodes: list[tuple[str, str]]  # (tagline, description), in generated order
     coverage_rationale: str
 
+    @field_validator("nodes", mode="before")
+    @classmethod
+    def nodes_from_mapping(cls, value: object) -> object:
+        """Accept the prompt's {tagline: description} object form."""
+        if isinstance(value, dict):
+            return list(value.items())
+        return value
+
 
 class DTSRunResult(BaseModel):
     """Result of running the Dialogue Tree Search."""
@@ -454,10 +865,33 @@ class DTSRunResult(BaseModel):
 
     model_config = {"arbitrary_types_allowed": True}
 
+    # Built lazily; add_node() invalidates both
+    _exploration_cache: dict | None = PrivateAttr(default=None)
+    _node_index: dict[str, DialogueNode] | None = PrivateAttr(default=None)
+
+    def add_node(self, node: DialogueNode) -> None:
+        """Append a node, invalidating the cached index and exploration dict."""
+        self.all_nodes.append(node)
+        self._exploration_cache = None
+        self._node_index = None
+
+    def set_node_index(self, index: dict[str, DialogueNode]) -> None:
+        """Reuse an existing id -> node mapping (e.g. DialogueTree.nodes) as the index."""
+        self._node_index = index
+        self._exploration_cache = None
+
+    def get_node(self, node_id: str | None) -> DialogueNode | None:
+        """Look up a node by id (index is built on first use)."""
+        if self._node_index is None:
+            self._node_index = {node.id: node for node in self.all_nodes}
+        return self._node_index.get(node_id) if node_id else None
+
     def to_exploration_dict(self) -> dict:
         """
         Convert to a dict optimized for exploring branches and scores.
 
+        The dict is built once and cached; treat it as read-only.
+
         Structure:
         {
             "summary": { ... },
@@ -479,9 +913,22 @@ class DTSRunResult(BaseModel):
             ]
         }
         """
-        # Build branches list (excluding root)
-        branches = []
+        if self._exploration_cache is not None:
+            return self._exploration_cache
+
+        # Build branches list (excluding root) and status counts in a single pass
+        # Presized: every node but the root becomes a branch; the tail is trimmed below
+        keyed_branches: list = [None] * len(self.all_nodes)
+        branch_count = 0
+        best_trajectory: list[dict] | None = None
+        active_count = pruned_count = 0
         for node in self.all_nodes:
+            status = node.status
+            if status is NodeStatus.ACTIVE:
+                active_count += 1
+            elif status is NodeStatus.PRUNED:
+                pruned_count += 1
+
             if node.strategy is None:
                 continue  # Skip root node
 
@@ -507,32 +954,33 @@ class DTSRunResult(BaseModel):
                     "value_mean": node.stats.value_mean,
                     "critiques": node.stats.critiques if node.stats.critiques else None,
                 },
-                "trajectory": [{"role": msg.role, "content": msg.content} for msg in node.messages],
+                "trajectory": _trajectory(node.messages),
                 "prune_reason": node.prune_reason,
             }
-            branches.append(branch_data)
+            keyed_branches[branch_count] = (-node.stats.aggregated_score, branch_data)
+            branch_count += 1
+            if node.id == self.best_node_id:
+                best_trajectory = branch_data["trajectory"]
 
-        # Sort by score descending
-        branches.sort(key=lambda b: b["scores"]["aggregated"], reverse=True)
+        # Sort by score descending (all branches are exported, so no top-k cut).
+        # Keys are negated scores, so equal scores keep their node order.
+        del keyed_branches[branch_count:]
+        keyed_branches.sort(key=itemgetter(0))
+        branches = [branch for _, branch in keyed_branches]
 
         # Build best branch info
         best_branch = None
-        if self.best_node_id:
-            for node in self.all_nodes:
-                if node.id == self.best_node_id:
-                    best_branch = {
-                        "id": node.id,
-                        "strategy": node.strategy.tagline if node.strategy else "root",
-                        "score": self.best_score,
-                        "trajectory": [
-                            {"role": msg.role, "content": msg.content} for msg in node.messages
-                        ],
-                    }
-                    break
-
-        # Count stats
-        active_count = sum(1 for n in self.all_nodes if n.status == NodeStatus.ACTIVE)
-        pruned_count = sum(1 for n in self.all_nodes if n.status == NodeStatus.PRUNED)
+        best_node = self.get_node(self.best_node_id)
+        if best_node is not None:
+            best_branch = {
+                "id": best_node.id,
+                "strategy": best_node.strategy.tagline if best_node.strategy else "root",
+                "score": self.best_score,
+                # Reuse the branch entry's list when the best node is a branch
+                "trajectory": best_trajectory
+                if best_trajectory is not None
+                else _trajectory(best_node.messages),
+            }
 
         result = {
             "summary": {
@@ -551,13 +999,36 @@ class DTSRunResult(BaseModel):
         if self.token_usage:
             result["token_usage"] = self.token_usage
 
+        self._exploration_cache = result
         return result
 
     def to_json(self, indent: int = 2) -> str:
         """Convert to formatted JSON string for exploration."""
-        return json.dumps(self.to_exploration_dict(), indent=indent, ensure_ascii=False)
+        data = self.to_exploration_dict()
+        if orjson is not None and indent == 2:
+            return orjson.dumps(data, option=_ORJSON_OPTIONS).decode()
+        return json.dumps(data, indent=indent, ensure_ascii=False)
 
     def save_json(self, path: str) -> None:
-        """Save exploration data to a JSON file."""
-        Path(path).write_text(self.to_json(), encoding="utf-8")
+        """
+        Save exploration data to a JSON file.
+
+        Writes the same document as to_json(), but encodes one branch at a time
+        so the full serialized output is never held in memory.
+        """
+        data = self.to_exploration_dict()
+        with Path(path).open("wb", buffering=1 << 20) as f:
+            f.write(b"{")
+            for i, (key, value) in enumerate(data.items()):
+                f.write(b",\n  " if i else b"\n  ")
+                f.write(_json_bytes(key) + b": ")
+                if key != "branches" or not value:
+                    f.write(_json_bytes(value, level=1))
+                    continue
+                f.write(b"[")
+                for j, branch in enumerate(value):
+                    f.write(b",\n    " if j else b"\n    ")
+                    f.write(_json_bytes(branch, level=2))
+                f.write(b"\n  ]")
+            f.write(b"\n}")
         logger.info(f"Results saved to {path}")
@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 import asyncio
+import inspect
 import logging
-from collections.abc import Callable, Coroutine
+from collections import deque
+from collections.abc import Callable, Coroutine, Sequence
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
@@ -26,8 +28,16 @@ def log_phase(
         message: The log message.
         indent: Number of indentation levels (2 spaces each).
     """
-    prefix = "  " * indent
-    logger.info(f"[DTS:{phase}] {prefix}{message}")
+    logger.info("[DTS:%s] %s%s", phase, "  " * indent, message)
+
+
+# Display names for message roles (avoids str.capitalize() per message)
+_ROLE_DISPLAY = {
+    "system": "System",
+    "user": "User",
+    "assistant": "Assistant",
+    "tool": "Tool",
+}
 
 
 def format_message_history(messages: list[Message]) -> str:
@@ -40,16 +50,18 @@ def format_message_history(messages: list[Message]) -> str:
     Returns:
         Formatted string with each message on a new line.
     """
-    lines = []
-    for msg in messages:
-        role = msg.role.capitalize()
-        content = msg.content or ""
-        lines.append(f"{role}: {content}")
-    return "\n\n".join(lines)
+    return "\n\n".join(
+        [
+            f"{_ROLE_DISPLAY.get(msg.role) or msg.role.capitalize()}: {msg.content or ''}"
+            for msg in messages
+        ]
+    )
 
 
 async def emit_event(
-    callback: Callable[..., Coroutine[Any, Any, None] | Any] | None,
+    callback: Callable[..., Coroutine[Any, Any, None] | Any]
+    | Sequence[Callable[..., Coroutine[Any, Any, None] | Any]]
+    | None,
     event_type: str,
     data: dict[str, Any],
     logger: logging.Logger | None = None,
@@ -58,9 +70,11 @@ async def emit_event(
     Safely emit an event via callback if provided.
 
     Handles both sync and async callbacks. Logs warnings on errors.
+    A list of callbacks is invoked concurrently; a failing callback is
+    logged without affecting the others.
 
     Args:
-        callback: Optional event callback function.
+        callback: Optional event callback function, or a list of them.
         event_type: Type of event being emitted.
         data: Event data dictionary.
         logger: Optional logger for error reporting.
@@ -68,15 +82,158 @@ async def emit_event(
     if callback is None:
         return
 
+    if isinstance(callback, Sequence):
+        if len(callback) == 1:
+            await _invoke_callback(callback[0], event_type, data, logger)
+        elif callback:
+            # Errors are handled per callback, so the group never cancels siblings
+            async with asyncio.TaskGroup() as tg:
+                for cb in callback:
+                    tg.create_task(_invoke_callback(cb, event_type, data, logger))
+        return
+
+    await _invoke_callback(callback, event_type, data, logger)
+
+
+async def _invoke_callback(
+    callback: Callable[..., Coroutine[Any, Any, None] | Any],
+    event_type: str,
+    data: dict[str, Any],
+    logger: logging.Logger | None,
+) -> None:
+    """Invoke a single callback, logging (not raising) any error."""
     try:
-        result = callback(event_type, data)
-        if asyncio.iscoroutine(result):
-            await result
+        if _is_async_callable(callback):
+            await callback(event_type, data)
+        else:
+            callback(event_type, data)
     except Exception as e:
         if logger:
             logger.warning(f"Event callback error: {e}")
 
 
+def _is_async_callable(callback: Callable[..., Any]) -> bool:
+    """Return True if calling `callback` produces an awaitable coroutine."""
+    return inspect.iscoroutinefunction(callback) or inspect.iscoroutinefunction(
+        type(callback).__call__
+    )
+
+
+# Event type used to deliver several events at once to batch-capable callbacks
+BATCH_EVENT = "batch"
+
+
+# Events that only refresh progress displays; a full buffer drops these (oldest
+# first) and never the ones that build up the tree on the client
+DROPPABLE_EVENTS = frozenset({"token_update", "phase"})
+
+
+class EventPump:
+    """
+    Deliver events to a callback in order from a bounded buffer.
+
+    Replaces one fire-and-forget task per event with a single worker task that
+    drains the buffer and exits when it is empty (it is restarted by the next
+    emit). When the buffer is full the oldest pending progress event (see
+    DROPPABLE_EVENTS) is dropped, so a slow consumer cannot grow memory
+    without bound through them. Structural events (node_added, nodes_pruned,
+    ...) are never dropped; if nothing droppable is pending they are buffered
+    past the limit.
+
+    Whether the callback is sync or async is detected once here: sync
+    callbacks are invoked inline by emit() and never touch the buffer.
+
+    An async callback that sets ``callback.batch = True`` receives the events
+    that accumulated while it was busy as one ``BATCH_EVENT`` call (up to
+    ``max_batch`` at a time) with data ``{"events": [{"type", "data"}, ...]}``.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, None] | Any]
+        | Sequence[Callable[..., Coroutine[Any, Any, None] | Any]]
+        | None,
+        logger: logging.Logger,
+        maxsize: int = 1024,
+        max_batch: int = 32,
+    ) -> None:
+        """
+        Initialize the pump.
+
+        Args:
+            callback: Optional event callback (sync or async), or a list of
+                callbacks that each receive every event concurrently.
+            logger: Logger for error reporting.
+            maxsize: Maximum number of undelivered events to buffer.
+            max_batch: Maximum events per call for batch-capable callbacks.
+        """
+        if isinstance(callback, Sequence):
+            callbacks = tuple(callback)
+
+            async def fan_out(event_type: str, data: dict[str, Any]) -> None:
+                await emit_event(callbacks, event_type, data, logger)
+
+            callback = fan_out if callbacks else None
+        self._callback = callback
+        self._logger = logger
+        self._is_async = callback is not None and _is_async_callable(callback)
+        self._max_batch = max_batch if self._is_async and getattr(callback, "batch", False) else 1
+        self._pending: deque[tuple[str, dict[str, Any]]] = deque()
+        self._maxsize = maxsize
+        self._worker: asyncio.Task[None] | None = None
+        self._dropped = 0
+
+    def emit(self, event_type: str, data: dict[str, Any]) -> None:
+        """Queue an event for delivery without awaiting it."""
+        if self._callback is None:
+            return
+        if not self._is_async:
+            try:
+                self._callback(event_type, data)
+            except Exception as e:
+                self._logger.warning(f"Event callback error: {e}")
+            return
+        pending = self._pending
+        if len(pending) >= self._maxsize:
+            for i, (pending_type, _) in enumerate(pending):
+                if pending_type in DROPPABLE_EVENTS:
+                    del pending[i]
+                    self._dropped += 1
+                    break
+            else:
+                if event_type in DROPPABLE_EVENTS:
+                    self._dropped += 1
+                    return
+        pending.append((event_type, data))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._drain())
+
+    async def flush(self) -> None:
+        """Wait until every queued event has been delivered."""
+        while self._worker is not None and not self._worker.done():
+            await asyncio.wait({self._worker})
+
+    async def _drain(self) -> None:
+        callback = self._callback
+        pending = self._pending
+        while pending:
+            try:
+                if self._max_batch == 1:
+                    await callback(*pending.popleft())
+                else:
+                    # Events that queued up while the callback was busy go out together
+                    count = min(len(pending), self._max_batch)
+                    events = [pending.popleft() for _ in range(count)]
+                    await callback(
+                        BATCH_EVENT, {"events": [{"type": t, "data": d} for t, d in events]}
+                    )
+            except Exception as e:
+                self._logger.warning(f"Event callback error: {e}")
+        if self._dropped:
+            self._logger.warning(f"Dropped {self._dropped} progress events (event buffer full)")
+            self._dropped = 0
+
+
 def create_event_emitter(
     callback: Callable[..., Coroutine[Any, Any, None] | Any] | None,
     logger: logging.Logger,
@@ -84,19 +241,14 @@ def create_event_emitter(
     """
     Create a fire-and-forget event emitter function.
 
-    Used by components to emit events without awaiting. The returned function
-    creates an asyncio task to handle the event asynchronously.
+    Used by components to emit events without awaiting. Events are delivered
+    in order by an EventPump worker task.
 
     Args:
         callback: Optional async event callback function.
         logger: Logger for error reporting.
 
     Returns:
-        A sync function that emits events via asyncio.create_task.
+        A sync function that queues events for delivery.
     """
-
-    def emit(event_type: str, data: dict[str, Any]) -> None:
-        if callback is not None:
-            asyncio.create_task(emit_event(callback, event_type, data, logger))
-
-    return emit
+    return EventPump(callback, logger).emit
@@ -1,9 +1,256 @@
+# -----------------------------------------------------------------------------
+# Imports
+# -----------------------------------------------------------------------------
+from functools import lru_cache
+
 # -----------------------------------------------------------------------------
 # Type Alias
 # -----------------------------------------------------------------------------
 PromptPair = tuple[str, str]  # (system_content, user_content)
 
 
+# -----------------------------------------------------------------------------
+# Fixed Prompt Text
+# -----------------------------------------------------------------------------
+# Static instructions live here, built once at import; the methods below only
+# format per-call content around them.
+
+_STRATEGY_GENERATOR_SYSTEM = """You are a strategic conversation planner. Generate diverse, orthogonal approaches for achieving conversation goals. Each strategy should explore a genuinely different dimension of the problem space.
+
+You must output valid JSON only. No markdown code fences, no preamble."""
+
+_INTENT_GENERATOR_SYSTEM = """You analyze conversations to generate diverse, plausible user response intents. Create orthogonal user behaviors that stress-test different conversation branches.
+
+Requirements:
+- Each intent must be orthogonal (genuinely different reaction)
+- Include at least one "difficult" intent (resistant, confused, challenging)
+- Include at least one "cooperative" intent (engaged, accepting)
+
+Emotional tones: engaged, resistant, confused, skeptical, enthusiastic, deflecting, anxious, neutral
+Cognitive stances: accepting, questioning, challenging, exploring, withdrawing
+
+Output format:
+{
+  "intents": [
+    {
+      "id": "short_id",
+      "label": "2-4 word label",
+      "description": "One sentence describing how the user will respond",
+      "emotional_tone": "one of the tones above",
+      "cognitive_stance": "one of the stances above"
+    }
+  ]
+}
+
+You must output valid JSON only. No markdown code fences, no preamble."""
+
+_USER_SIMULATION_INSTRUCTIONS = """You are simulating a user in a conversation. Respond authentically as they would - not as an idealized or overly cooperative version.
+
+Guidelines:
+- Match the user's established voice and communication style
+- Real users push back, get confused, change minds, and have emotional reactions
+- Balance goal-direction with natural human behavior
+- Do NOT fabricate results, data, or context not established in the conversation
+
+Output the next user message only. No meta-commentary, no JSON. Just the raw message.
+
+CRITICAL: Your response must be non-empty. Even resistant users say something."""
+
+_ASSISTANT_CONTINUATION_INSTRUCTIONS = """You are the assistant continuing a conversation. Follow the given strategy naturally - the user should experience coherent conversation, not a strategy being deployed.
+
+Guidelines:
+- The strategy shapes your approach, not your exact words
+- Respond to what the user actually said before advancing the strategy
+- Match the user's energy and register
+- If the strategy conflicts with the conversation's needs, prioritize the conversation
+
+Output the next assistant message only. No meta-commentary, no JSON."""
+
+_REPHRASE_SYSTEM = """You rephrase messages to incorporate specific emotional tones and cognitive stances while preserving core meaning.
+
+Output ONLY the rephrased message. No explanation, no quotes, no preamble."""
+
+_OUTCOME_JUDGE_SYSTEM = """You are an EXACTING evaluator of conversation trajectories. Find flaws, identify missed opportunities, and score HARSHLY. Most conversations are mediocre - surface that reality.
+
+Calibration:
+- 7/10 = genuinely good conversation
+- 8+ = rare, exceptional execution
+- 10/10 = flawless, almost never appropriate
+
+Evaluate against these criteria (0.0-1.0 each, find something to critique):
+
+1. goal_achieved: Was the goal FULLY achieved?
+2. user_need_addressed: Was the UNDERLYING need met?
+3. forward_progress: Did EVERY turn move forward?
+4. user_engagement_maintained: Did engagement INCREASE?
+5. rapport_preserved: Was rapport STRENGTHENED?
+6. appropriate_resolution: Was the ending OPTIMAL?
+7. actionable_outcome: Are next steps CONCRETE?
+8. no_harm_done: ANY risk of harm or confusion?
+9. efficient_path: Was this the SHORTEST viable path?
+10. user_better_off: Is improvement SIGNIFICANT?
+
+Output format:
+{
+  "criteria": {
+    "goal_achieved": {"score": 0.0-1.0, "rationale": "what was lacking"},
+    ...
+  },
+  "total_score": sum of all scores (0-10),
+  "confidence": "low|medium|high",
+  "summary": "One sentence critique",
+  "biggest_missed_opportunity": "What could have made this better"
+}
+
+VERIFY: Your total should typically be 4-7. Above 8 requires exceptional justification.
+
+You must output valid JSON only. No markdown code fences, no preamble."""
+
+_BRANCH_JUDGE_SYSTEM = """You evaluate conversation branch choices. Score how promising a direction is BEFORE it's explored - like evaluating a chess move based on position, not outcome.
+
+Evaluate against these criteria (0.0, 0.5, or 1.0):
+
+1. goal_aligned: Advances toward the goal?
+2. contextually_appropriate: Matches user's expertise level?
+3. emotionally_attuned: Respects user's emotional state?
+4. well_timed: Right moment for this move?
+5. builds_on_history: Connects to what's been discussed?
+6. information_generating: Will reveal useful information?
+7. not_redundant: Explores new territory?
+8. appropriately_scoped: Neither too narrow nor too broad?
+9. actionable: Can lead to concrete next steps?
+10. low_risk: Unlikely to damage rapport?
+
+Output format:
+{
+  "criteria": {
+    "goal_aligned": {"score": 0|0.5|1, "rationale": "one sentence"},
+    ...
+  },
+  "total_score": sum (0-10),
+  "confidence": "low|medium|high",
+  "summary": "One sentence assessment"
+}
+
+You must output valid JSON only. No markdown code fences, no preamble."""
+
+_COMPARATIVE_JUDGE_SYSTEM = """You compare conversation trajectories and force-rank them. Find flaws in ALL trajectories and assign scores that CREATE SEPARATION.
+
+Scoring scale:
+- Rank 1 = 7.5 (best of set, still has flaws)
+- Rank 2 = 6.0
+- Rank 3 = 4.5
+- Each subsequent rank: subtract 1.5
+
+Only Rank 1 scores 8.5+ if TRULY exceptional. 9+ requires flawless execution.
+
+For each trajectory, find 2-3 specific weaknesses. Then force-rank (NO TIES).
+
+Output format:
+{
+  "critiques": {
+    "trajectory_id": {
+      "weaknesses": ["specific weakness 1", "specific weakness 2"],
+      "strengths": ["specific strength"],
+      "key_moment": "moment that most affected quality"
+    }
+  },
+  "ranking": [
+    {
+      "rank": 1,
+      "trajectory_id": "id",
+      "score": 7.5,
+      "reason": "Why ranked #1"
+    },
+    ...
+  ],
+  "ranking_confidence": "low|medium|high"
+}
+
+VERIFY: Rank 1 <= 8.0 unless exceptional. Gap between ranks >= 1.0 point.
+
+You must output valid JSON only. No markdown code fences, no preamble."""
+
+_BATCHED_COMPARATIVE_JUDGE_SYSTEM = """You compare conversation trajectories and force-rank them. You are given several independent GROUPS of trajectories; rank each group separately, comparing trajectories only with others in the same group. Find flaws in ALL trajectories and assign scores that CREATE SEPARATION.
+
+Scoring scale (within each group):
+- Rank 1 = 7.5 (best of set, still has flaws)
+- Rank 2 = 6.0
+- Rank 3 = 4.5
+- Each subsequent rank: subtract 1.5
+
+Only Rank 1 scores 8.5+ if TRULY exceptional. 9+ requires flawless execution.
+
+For each trajectory, find 2-3 specific weaknesses. Then force-rank each group (NO TIES).
+
+Output format:
+{
+  "critiques": {
+    "trajectory_id": {
+      "weaknesses": ["specific weakness 1", "specific weakness 2"],
+      "strengths": ["specific strength"],
+      "key_moment": "moment that most affected quality"
+    }
+  },
+  "rankings": {
+    "group_id": [
+      {
+        "rank": 1,
+        "trajectory_id": "id",
+        "score": 7.5,
+        "reason": "Why ranked #1"
+      },
+      ...
+    ]
+  }
+}
+
+VERIFY: One ranking per group id, covering every trajectory in that group. Rank 1 <= 8.0 unless exceptional. Gap between ranks >= 1.0 point.
+
+You must output valid JSON only. No markdown code fences, no preamble."""
+
+_COHORT_JUDGE_SYSTEM = """You are an EXACTING evaluator of conversation trajectories. You score several independent trajectories in one pass. Judge each on its own merits, but use the others to keep your scale consistent.
+
+Calibration:
+- 7/10 = genuinely good conversation
+- 8+ = rare, exceptional execution
+- 10/10 = flawless, almost never appropriate
+
+Score EVERY trajectory from 0 to 10 for how well it achieved the goal, met the user's underlying need, kept forward progress and rapport, and reached a concrete, efficient resolution.
+
+Output format:
+{
+  "scores": {
+    "trajectory_id": 5.5,
+    ...
+  },
+  "critiques": {
+    "trajectory_id": {
+      "weaknesses": ["specific weakness 1", "specific weakness 2"],
+      "strengths": ["specific strength"],
+      "key_moment": "moment that most affected quality"
+    }
+  }
+}
+
+VERIFY: One score per trajectory id. Scores should typically be 4-7.
+
+You must output valid JSON only. No markdown code fences, no preamble."""
+
+
+@lru_cache(maxsize=64)
+def _with_research(system: str, heading: str, research: str | None) -> str:
+    """
+    Append the research context to a fixed system prompt.
+
+    Memoized: a run passes the same (often long) research context to every
+    judge call, so the combined prompt is built once per prompt kind.
+    """
+    if not research:
+        return system
+    return f"{system}\n\n{heading}:\n{research}"
+
+
 # -----------------------------------------------------------------------------
 # Class: PromptService
 # -----------------------------------------------------------------------------
@@ -27,22 +274,16 @@ class PromptService:
         deep_research_context: str | None = None,
     ) -> PromptPair:
         """Generate diverse conversation strategies."""
-        system = """You are a strategic conversation planner. Generate diverse, orthogonal approaches for achieving conversation goals. Each strategy should explore a genuinely different dimension of the problem space.
-
-You must output valid JSON only. No markdown code fences, no preamble."""
-
-        research_section = ""
-        if deep_research_context:
-            research_section = f"""
-
-Research context:
-{deep_research_context}
-"""
+        # Research context is large and reused across runs on the same goal, so
+        # it extends the static system prompt (a cacheable prefix)
+        system = _with_research(
+            _STRATEGY_GENERATOR_SYSTEM, "Research context", deep_research_context
+        )
 
         user = f"""Goal: {conversation_goal}
 
 User's message: {conversation_context}
-{research_section}
+
 Generate exactly {num_nodes} distinct conversation strategies.
 
 Requirements:
@@ -72,37 +313,15 @@ Output format:
         conversation_history: str,
     ) -> PromptPair:
         """Generate diverse user response intents."""
-        system = """You analyze conversations to generate diverse, plausible user response intents. Create orthogonal user behaviors that stress-test different conversation branches.
-
-You must output valid JSON only. No markdown code fences, no preamble."""
+        # Fixed instructions first and per-call details last (prefix caching)
+        system = _INTENT_GENERATOR_SYSTEM
 
         user = f"""Goal: {conversation_goal}
 
 Conversation history:
 {conversation_history}
 
-Generate exactly {num_intents} distinct user response INTENTS (behavioral directions, not actual responses).
-
-Requirements:
-- Each intent must be orthogonal (genuinely different reaction)
-- Include at least one "difficult" intent (resistant, confused, challenging)
-- Include at least one "cooperative" intent (engaged, accepting)
-
-Emotional tones: engaged, resistant, confused, skeptical, enthusiastic, deflecting, anxious, neutral
-Cognitive stances: accepting, questioning, challenging, exploring, withdrawing
-
-Output format:
-{{
-  "intents": [
-    {{
-      "id": "short_id",
-      "label": "2-4 word label",
-      "description": "One sentence describing how the user will respond",
-      "emotional_tone": "one of the tones above",
-      "cognitive_stance": "one of the stances above"
-    }}
-  ]
-}}"""
+Generate exactly {num_intents} distinct user response INTENTS (behavioral directions, not actual responses)."""
 
         return system, user
 
@@ -130,19 +349,9 @@ You MUST embody this specific intent:
 - Cognitive stance: {user_intent.get("cognitive_stance", "")}
 """
 
-        system = f"""You are simulating a user in a conversation. Respond authentically as they would - not as an idealized or overly cooperative version.
-
-Goal context: {conversation_goal}
-{intent_section}
-Guidelines:
-- Match the user's established voice and communication style
-- Real users push back, get confused, change minds, and have emotional reactions
-- Balance goal-direction with natural human behavior
-- Do NOT fabricate results, data, or context not established in the conversation
-
-Output the next user message only. No meta-commentary, no JSON. Just the raw message.
-
-CRITICAL: Your response must be non-empty. Even resistant users say something."""
+        # Fixed instructions first and per-call details last, so calls share the
+        # longest possible prompt prefix (provider-side prompt caching)
+        system = f"{_USER_SIMULATION_INSTRUCTIONS}\n\nGoal context: {conversation_goal}\n{intent_section}"
 
         user = "Continue the conversation as the user. Generate the next user message."
 
@@ -163,20 +372,11 @@ CRITICAL: Your response must be non-empty. Even resistant users say something.""
 
         Note: Conversation history is passed as separate messages.
         """
-        system = f"""You are the assistant continuing a conversation. Follow the given strategy naturally - the user should experience coherent conversation, not a strategy being deployed.
-
-Goal: {conversation_goal}
-
-Strategy to follow:
-- {strategy_tagline}: {strategy_description}
-
-Guidelines:
-- The strategy shapes your approach, not your exact words
-- Respond to what the user actually said before advancing the strategy
-- Match the user's energy and register
-- If the strategy conflicts with the conversation's needs, prioritize the conversation
-
-Output the next assistant message only. No meta-commentary, no JSON."""
+        # Fixed instructions first, then the goal, then the per-branch strategy
+        system = (
+            f"{_ASSISTANT_CONTINUATION_INSTRUCTIONS}\n\nGoal: {conversation_goal}\n\n"
+            f"Strategy to follow:\n- {strategy_tagline}: {strategy_description}"
+        )
 
         user = "Continue the conversation as the assistant. Generate your next response."
 
@@ -195,9 +395,7 @@ Output the next assistant message only. No meta-commentary, no JSON."""
         cognitive_stance: str,
     ) -> PromptPair:
         """Rephrase a message to incorporate a specific intent."""
-        system = """You rephrase messages to incorporate specific emotional tones and cognitive stances while preserving core meaning.
-
-Output ONLY the rephrased message. No explanation, no quotes, no preamble."""
+        system = _REPHRASE_SYSTEM
 
         user = f"""Original message: {original_message}
 
@@ -221,54 +419,20 @@ Keep roughly the same length. Make it sound natural."""
         deep_research_context: str | None = None,
     ) -> PromptPair:
         """Evaluate a conversation trajectory."""
-        system = """You are an EXACTING evaluator of conversation trajectories. Find flaws, identify missed opportunities, and score HARSHLY. Most conversations are mediocre - surface that reality.
-
-Calibration:
-- 7/10 = genuinely good conversation
-- 8+ = rare, exceptional execution
-- 10/10 = flawless, almost never appropriate
-
-You must output valid JSON only. No markdown code fences, no preamble."""
-
-        research_section = ""
-        if deep_research_context:
-            research_section = f"""
-
-Research context (assess whether choices were sound):
-{deep_research_context}
-"""
+        # Rubric (and the run's research context) form a fixed prefix; the
+        # goal and the trajectory being judged come last (prefix caching)
+        system = _with_research(
+            _OUTCOME_JUDGE_SYSTEM,
+            "Research context (assess whether choices were sound)",
+            deep_research_context,
+        )
 
         user = f"""Goal: {conversation_goal}
 
 Conversation:
 {conversation_history}
-{research_section}
-Evaluate against these criteria (0.0-1.0 each, find something to critique):
 
-1. goal_achieved: Was the goal FULLY achieved?
-2. user_need_addressed: Was the UNDERLYING need met?
-3. forward_progress: Did EVERY turn move forward?
-4. user_engagement_maintained: Did engagement INCREASE?
-5. rapport_preserved: Was rapport STRENGTHENED?
-6. appropriate_resolution: Was the ending OPTIMAL?
-7. actionable_outcome: Are next steps CONCRETE?
-8. no_harm_done: ANY risk of harm or confusion?
-9. efficient_path: Was this the SHORTEST viable path?
-10. user_better_off: Is improvement SIGNIFICANT?
-
-Output format:
-{{
-  "criteria": {{
-    "goal_achieved": {{"score": 0.0-1.0, "rationale": "what was lacking"}},
-    ...
-  }},
-  "total_score": sum of all scores (0-10),
-  "confidence": "low|medium|high",
-  "summary": "One sentence critique",
-  "biggest_missed_opportunity": "What could have made this better"
-}}
-
-VERIFY: Your total should typically be 4-7. Above 8 requires exceptional justification."""
+Evaluate this conversation."""
 
         return system, user
 
@@ -284,9 +448,8 @@ VERIFY: Your total should typically be 4-7. Above 8 requires exceptional justifi
         branch_description: str,
     ) -> PromptPair:
         """Evaluate a branch selection decision."""
-        system = """You evaluate conversation branch choices. Score how promising a direction is BEFORE it's explored - like evaluating a chess move based on position, not outcome.
-
-You must output valid JSON only. No markdown code fences, no preamble."""
+        # Fixed rubric first and per-call details last (prefix caching)
+        system = _BRANCH_JUDGE_SYSTEM
 
         user = f"""Goal: {conversation_goal}
 
@@ -294,31 +457,7 @@ Context:
 {conversation_context}
 
 Branch selected: {branch_tagline}
-Description: {branch_description}
-
-Evaluate against these criteria (0.0, 0.5, or 1.0):
-
-1. goal_aligned: Advances toward the goal?
-2. contextually_appropriate: Matches user's expertise level?
-3. emotionally_attuned: Respects user's emotional state?
-4. well_timed: Right moment for this move?
-5. builds_on_history: Connects to what's been discussed?
-6. information_generating: Will reveal useful information?
-7. not_redundant: Explores new territory?
-8. appropriately_scoped: Neither too narrow nor too broad?
-9. actionable: Can lead to concrete next steps?
-10. low_risk: Unlikely to damage rapport?
-
-Output format:
-{{
-  "criteria": {{
-    "goal_aligned": {{"score": 0|0.5|1, "rationale": "one sentence"}},
-    ...
-  }},
-  "total_score": sum (0-10),
-  "confidence": "low|medium|high",
-  "summary": "One sentence assessment"
-}}"""
+Description: {branch_description}"""
 
         return system, user
 
@@ -333,64 +472,89 @@ Output format:
         deep_research_context: str | None = None,
     ) -> PromptPair:
         """Compare and rank multiple trajectories."""
-        system = """You compare conversation trajectories and force-rank them. Find flaws in ALL trajectories and assign scores that CREATE SEPARATION.
+        # Rubric (and the run's research context) form a fixed prefix; the
+        # goal and the trajectories being ranked come last (prefix caching)
+        system = _with_research(
+            _COMPARATIVE_JUDGE_SYSTEM, "Research context", deep_research_context
+        )
+
+        # Format trajectories (one join rather than repeated concatenation)
+        traj_text = "".join(
+            f"\n--- Trajectory {t['id']} (intent: {t.get('intent_label', 'unknown')}) ---\n"
+            f"{t['history']}\n"
+            for t in trajectories
+        )
 
-Scoring scale:
-- Rank 1 = 7.5 (best of set, still has flaws)
-- Rank 2 = 6.0
-- Rank 3 = 4.5
-- Each subsequent rank: subtract 1.5
+        user = f"""Goal: {conversation_goal}
 
-Only Rank 1 scores 8.5+ if TRULY exceptional. 9+ requires flawless execution.
+Trajectories to compare:
+{traj_text}"""
 
-You must output valid JSON only. No markdown code fences, no preamble."""
+        return system, user
+
+    # -------------------------------------------------------------------------
+    # Batched Comparative Judge
+    # -------------------------------------------------------------------------
 
-        # Format trajectories
-        traj_text = ""
-        for t in trajectories:
-            traj_text += (
+    def batched_comparative_judge(
+        self,
+        conversation_goal: str,
+        groups: list[dict],
+        deep_research_context: str | None = None,
+    ) -> PromptPair:
+        """Rank the trajectories of several sibling groups in one pass."""
+        # Rubric (and the run's research context) form a fixed prefix; the
+        # goal and the groups being ranked come last (prefix caching)
+        system = _with_research(
+            _BATCHED_COMPARATIVE_JUDGE_SYSTEM, "Research context", deep_research_context
+        )
+
+        groups_text = "".join(
+            f"\n=== Group {g['parent_id']} ===\n"
+            + "".join(
                 f"\n--- Trajectory {t['id']} (intent: {t.get('intent_label', 'unknown')}) ---\n"
+                f"{t['history']}\n"
+                for t in g["trajectories"]
             )
-            traj_text += t["history"]
-            traj_text += "\n"
+            for g in groups
+        )
 
-        research_section = ""
-        if deep_research_context:
-            research_section = f"""
+        user = f"""Goal: {conversation_goal}
 
-Research context:
-{deep_research_context}
-"""
+Groups to rank:
+{groups_text}"""
 
-        user = f"""Goal: {conversation_goal}
-{research_section}
-Trajectories to compare:
-{traj_text}
+        return system, user
 
-For each trajectory, find 2-3 specific weaknesses. Then force-rank (NO TIES).
+    # -------------------------------------------------------------------------
+    # Cohort Trajectory Judge
+    # -------------------------------------------------------------------------
 
-Output format:
-{{
-  "critiques": {{
-    "trajectory_id": {{
-      "weaknesses": ["specific weakness 1", "specific weakness 2"],
-      "strengths": ["specific strength"],
-      "key_moment": "moment that most affected quality"
-    }}
-  }},
-  "ranking": [
-    {{
-      "rank": 1,
-      "trajectory_id": "id",
-      "score": 7.5,
-      "reason": "Why ranked #1"
-    }},
-    ...
-  ],
-  "ranking_confidence": "low|medium|high"
-}}
+    def trajectory_cohort_judge(
+        self,
+        conversation_goal: str,
+        trajectories: list[dict],
+        deep_research_context: str | None = None,
+    ) -> PromptPair:
+        """Score several unrelated trajectories in one pass."""
+        # Rubric (and the run's research context) form a fixed prefix; the
+        # goal and the trajectories being scored come last (prefix caching)
+        system = _with_research(
+            _COHORT_JUDGE_SYSTEM,
+            "Research context (assess whether choices were sound)",
+            deep_research_context,
+        )
+
+        traj_text = "".join(
+            f"\n--- Trajectory {t['id']} (intent: {t.get('intent_label', 'unknown')}) ---\n"
+            f"{t['history']}\n"
+            for t in trajectories
+        )
+
+        user = f"""Goal: {conversation_goal}
 
-VERIFY: Rank 1 <= 8.0 unless exceptional. Gap between ranks >= 1.0 point."""
+Trajectories to score:
+{traj_text}"""
 
         return system, user
 
@@ -1,11 +1,13 @@
 import json
 import re
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Callable
+from importlib.util import find_spec
 from typing import Any
 
 from openai import (
     APIError,
     AsyncOpenAI,
+    DefaultAsyncHttpxClient,
     AuthenticationError as OpenAIAuthError,
     RateLimitError as OpenAIRateLimitError,
 )
@@ -27,6 +29,24 @@ from .errors import (
 from .tools import Tool, ToolRegistry
 from .types import Completion, Function, Message, ToolCall, Usage
 
+try:
+    import orjson
+except ImportError:  # optional: faster structured-output parsing
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter
+_json_loads = orjson.loads if orjson else json.loads
+
+# HTTP/2 multiplexes concurrent requests over one connection; httpx needs the
+# optional `h2` package (httpx[http2]) for it
+_HTTP2 = find_spec("h2") is not None
+
+# Response clean-up patterns, compiled once (applied to every structured response)
+_THINK_TAGS = re.compile(r"<think>.*?</think>", re.DOTALL)
+_REASONING_TAGS = re.compile(r"<reasoning>.*?</reasoning>", re.DOTALL)
+_JSON_CODE_BLOCK = re.compile(r"```(?:json)?\s*([\s\S]*?)```")
+_JSON_SPAN = re.compile(r"(\{[\s\S]*\}|\[[\s\S]*\])")
+
 
 class LLM:
     """
@@ -54,6 +74,10 @@ class LLM:
         """
         Initialize the LLM client.
 
+        The client keeps one pooled HTTP connection set (HTTP/2 when `h2` is
+        installed), so reuse a single LLM instance rather than creating one
+        per request.
+
         Args:
             api_key: API key for authentication.
             base_url: Base URL for the API (OpenAI-compatible).
@@ -66,6 +90,7 @@ class LLM:
             base_url=base_url,
             timeout=timeout,
             max_retries=max_retries,
+            http_client=DefaultAsyncHttpxClient(http2=_HTTP2),
         )
         self._default_model = model
 
@@ -85,6 +110,7 @@ class LLM:
         max_json_retries: int = 3,
         provider: str | list[str] | None = None,
         reasoning_enabled: bool | None = None,
+        n: int | None = None,
         **kwargs: Any,
     ) -> Completion:
         """
@@ -102,11 +128,15 @@ class LLM:
             max_json_retries: Retries on JSON parse failure (default: 3).
             provider: Provider preference for OpenRouter (e.g., "Fireworks" or ["Fireworks", "Together"]).
             reasoning_enabled: Enable/disable reasoning tokens (OpenRouter). None = don't specify.
+            n: Number of samples to generate from the one prompt (prefilled once).
             **kwargs: Additional provider-specific parameters.
 
         Returns:
             Completion object with message and metadata.
             If structured_output=True, the .data field contains the parsed dict.
+            If n > 1, .samples holds one Completion per returned choice. Providers
+            may return fewer than n; with structured_output, unparseable samples
+            have data=None (the request is retried only if none parse).
 
         Raises:
             LLMError: On API errors.
@@ -127,6 +157,8 @@ class LLM:
             tool_choice=tool_choice,
             stop=stop,
         )
+        if n is not None and n > 1:
+            request_params["n"] = n
 
         extra_body = self._build_extra_body(
             provider, reasoning_enabled, kwargs.pop("extra_body", {})
@@ -160,6 +192,29 @@ class LLM:
 
             completion = self._parse_response(response)
 
+            if "n" in request_params:
+                completion.samples = [
+                    Completion(
+                        message=self._parse_message(choice.message),
+                        model=response.model,
+                        finish_reason=choice.finish_reason,
+                    )
+                    for choice in response.choices
+                ]
+                if structured_output:
+                    for sample in completion.samples:
+                        sample.data = self._load_json_or_none(sample.message.content)
+                    completion.data = completion.samples[0].data
+                    if all(sample.data is None for sample in completion.samples):
+                        last_error = JSONParseError(
+                            f"No parseable JSON in {len(completion.samples)} samples. "
+                            f"Model: {response.model}"
+                        )
+                        if attempt < attempts - 1:
+                            continue
+                        raise last_error
+                return completion
+
             if structured_output:
                 content = completion.message.content
 
@@ -189,7 +244,7 @@ class LLM:
                 content = self._extract_json(content)
 
                 try:
-                    completion.data = json.loads(content)
+                    completion.data = _json_loads(content)
                 except json.JSONDecodeError as e:
                     last_error = JSONParseError(f"Invalid JSON: {e}\nContent: {content[:500]}")
                     if attempt < attempts - 1:
@@ -210,6 +265,7 @@ class LLM:
         stop: list[str] | str | None = None,
         provider: str | list[str] | None = None,
         reasoning_enabled: bool | None = None,
+        on_usage: Callable[[Usage, str], None] | None = None,
         **kwargs: Any,
     ) -> AsyncIterator[str]:
         """
@@ -225,6 +281,8 @@ class LLM:
             stop: Stop sequences.
             provider: Provider preference for OpenRouter (e.g., "Fireworks" or ["Fireworks", "Together"]).
             reasoning_enabled: Enable/disable reasoning tokens (OpenRouter). None = don't specify.
+            on_usage: Called with (usage, model) when the provider reports usage, which
+                it does after the last content chunk (a stream closed early gets none).
             **kwargs: Additional parameters.
 
         Yields:
@@ -253,6 +311,8 @@ class LLM:
         if extra_body:
             kwargs["extra_body"] = extra_body
 
+        if on_usage is not None:
+            request_params["stream_options"] = {"include_usage": True}
         request_params.update(kwargs)
 
         try:
@@ -260,6 +320,8 @@ class LLM:
             async for chunk in stream:
                 if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
+                if on_usage is not None and chunk.usage:
+                    on_usage(self._parse_usage(chunk.usage), chunk.model)
         except OpenAIAuthError as e:
             raise AuthenticationError(str(e)) from e
         except OpenAIRateLimitError as e:
@@ -376,16 +438,60 @@ class LLM:
         if isinstance(messages, str):
             return [{"role": "user", "content": messages}]
         if isinstance(messages, Message):
-            return [messages.model_dump(exclude_none=True)]
-        return [m.model_dump(exclude_none=True) for m in messages]
+            return [self._message_dict(messages)]
+        return [self._message_dict(m) for m in messages]
+
+    def _message_dict(self, message: Message) -> dict[str, Any]:
+        """Convert a Message to an API dict, expanding cache_control into a content block."""
+        data = message.model_dump(exclude_none=True)
+        cache_control = data.pop("cache_control", None)
+        if cache_control is not None and isinstance(data.get("content"), str):
+            data["content"] = [
+                {"type": "text", "text": data["content"], "cache_control": cache_control}
+            ]
+        return data
+
+    def _load_json_or_none(self, content: str | None) -> dict[str, Any] | None:
+        """Parse JSON content the way structured_output does, or None if it fails."""
+        if not content:
+            return None
+        try:
+            return _json_loads(self._extract_json(self._strip_reasoning_tags(content)))
+        except json.JSONDecodeError:
+            return None
 
     def _parse_response(self, response: Any) -> Completion:
         """Parse OpenAI response into Completion."""
         if not response.choices:
             raise LLMError("Empty response from API: no choices returned")
         choice = response.choices[0]
-        msg = choice.message
+        message = self._parse_message(choice.message)
 
+        return Completion(
+            message=message,
+            usage=self._parse_usage(response.usage) if response.usage else None,
+            model=response.model,
+            finish_reason=choice.finish_reason,
+        )
+
+    def _parse_usage(self, usage: Any) -> Usage:
+        """Parse an OpenAI usage object into Usage."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        return Usage(
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            total_tokens=usage.total_tokens,
+            # OpenAI-style details first, then Anthropic-style top-level fields
+            cached_tokens=getattr(details, "cached_tokens", None)
+            or getattr(usage, "cache_read_input_tokens", None)
+            or 0,
+            cache_write_tokens=getattr(details, "cache_write_tokens", None)
+            or getattr(usage, "cache_creation_input_tokens", None)
+            or 0,
+        )
+
+    def _parse_message(self, msg: Any) -> Message:
+        """Parse an OpenAI choice message into a Message."""
         tool_calls = None
         if msg.tool_calls:
             tool_calls = [
@@ -400,27 +506,12 @@ class LLM:
                 for tc in msg.tool_calls
             ]
 
-        message = Message(
+        return Message(
             role="assistant",
             content=msg.content,
             tool_calls=tool_calls,
         )
 
-        usage = None
-        if response.usage:
-            usage = Usage(
-                prompt_tokens=response.usage.prompt_tokens,
-                completion_tokens=response.usage.completion_tokens,
-                total_tokens=response.usage.total_tokens,
-            )
-
-        return Completion(
-            message=message,
-            usage=usage,
-            model=response.model,
-            finish_reason=choice.finish_reason,
-        )
-
     def _map_api_error(self, error: APIError) -> LLMError:
         """Map OpenAI API errors to our error types."""
         message = str(error)
@@ -447,15 +538,15 @@ class LLM:
 
     def _strip_reasoning_tags(self, content: str) -> str:
         """Strip reasoning tags (e.g., <think>...</think>) from content."""
-        content = re.sub(r"<think>.*?</think>", "", content, flags=re.DOTALL)
-        content = re.sub(r"<reasoning>.*?</reasoning>", "", content, flags=re.DOTALL)
+        content = _THINK_TAGS.sub("", content)
+        content = _REASONING_TAGS.sub("", content)
         return content.strip()
 
     def _extract_json(self, content: str) -> str:
         """Extract JSON from content, handling markdown code blocks."""
         # Try to extract from markdown code blocks first
         # Match ```json ... ``` or ``` ... ```
-        json_block = re.search(r"```(?:json)?\s*([\s\S]*?)```", content)
+        json_block = _JSON_CODE_BLOCK.search(content)
         if json_block:
             return json_block.group(1).strip()
 
@@ -466,7 +557,7 @@ class LLM:
             return content
 
         # Try to find JSON anywhere in the content
-        json_match = re.search(r"(\{[\s\S]*\}|\[[\s\S]*\])", content)
+        json_match = _JSON_SPAN.search(content)
         if json_match:
             return json_match.group(1)
 
@@ -1,5 +1,6 @@
 import inspect
 import json
+import re
 from collections.abc import Awaitable, Callable
 from typing import Any, get_args, get_origin
 
@@ -139,8 +140,6 @@ class Tool:
             except json.JSONDecodeError:
                 # Some models return malformed JSON, try to fix common issues
                 # e.g., {"a": 1}{"b": 2} -> {"a": 1, "b": 2}
-                import re
-
                 fixed = re.sub(r"\}\s*\{", ", ", arguments)
                 arguments = json.loads(fixed)
 
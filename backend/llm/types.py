@@ -27,14 +27,20 @@ class Message(BaseModel):
     content: str | None = None
     tool_calls: list[ToolCall] | None = None
     tool_call_id: str | None = None
+    # Prompt-cache breakpoint, e.g. {"type": "ephemeral"}; the content is then
+    # sent as a text block carrying this marker (Anthropic-style caching)
+    cache_control: dict[str, str] | None = None
+
+    # The system/user factories run for every LLM call; their arguments are already
+    # typed and the role is fixed, so they skip validation via model_construct
 
     @classmethod
-    def system(cls, content: str) -> "Message":
-        return cls(role="system", content=content)
+    def system(cls, content: str, cache_control: dict[str, str] | None = None) -> "Message":
+        return cls.model_construct(role="system", content=content, cache_control=cache_control)
 
     @classmethod
     def user(cls, content: str) -> "Message":
-        return cls(role="user", content=content)
+        return cls.model_construct(role="user", content=content)
 
     @classmethod
     def assistant(
@@ -53,6 +59,8 @@ class Usage(BaseModel):
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    cached_tokens: int = 0  # Prompt tokens served from the provider's prompt cache
+    cache_write_tokens: int = 0  # Prompt tokens written to the prompt cache
 
 
 class Completion(BaseModel):
@@ -63,6 +71,8 @@ class Completion(BaseModel):
     model: str | None = None
     finish_reason: str | None = None
     data: dict[str, Any] | None = None  # Parsed JSON when structured_output=True
+    # One completion per returned choice when n > 1 was requested (usage stays on the parent)
+    samples: list["Completion"] | None = None
 
     @property
     def has_tool_calls(self) -> bool:
@@ -4,18 +4,26 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import AsyncIterator
+from functools import cache
 from typing import Any
 
 from backend.api.schemas import SearchRequest
 from backend.core.dts.config import DTSConfig
 from backend.core.dts.engine import DTSEngine
+from backend.core.dts.utils import BATCH_EVENT
 from backend.llm.client import LLM
 from backend.utils.config import config
 from backend.utils.logging import logger
 
 
+@cache
 def create_llm_client() -> LLM:
-    """Create LLM client using global config."""
+    """
+    Create the LLM client using global config.
+
+    Cached so that every session shares one client and its connection pool
+    instead of opening new connections (and TLS handshakes) per search.
+    """
     return LLM(
         api_key=config.openai_api_key,
         base_url=config.openai_base_url,
@@ -49,7 +57,13 @@ async def run_dts_session(request: SearchRequest) -> AsyncIterator[dict[str, Any
     event_queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
 
     async def event_callback(event_type: str, data: dict[str, Any]) -> None:
-        await event_queue.put({"type": event_type, "data": data})
+        if event_type == BATCH_EVENT:
+            for event in data["events"]:
+                event_queue.put_nowait(event)
+        else:
+            await event_queue.put({"type": event_type, "data": data})
+
+    event_callback.batch = True  # type: ignore[attr-defined]
 
     engine.set_event_callback(event_callback)
 
@@ -70,6 +84,8 @@ async def run_dts_session(request: SearchRequest) -> AsyncIterator[dict[str, Any
         except Exception:
             logger.exception("Engine run failed")
             raise
+        finally:
+            engine.close()
 
     engine_task = asyncio.create_task(run_engine())
 
@@ -35,6 +35,16 @@ class Config(BaseSettings):
         description="Maximum concurrent LLM calls",
     )
 
+    # Model pricing catalog (fetched from OpenRouter, cached on disk)
+    pricing_cache_path: str = Field(
+        default=".cache/openrouter_pricing.json",
+        description="File used to cache the OpenRouter pricing catalog between runs",
+    )
+    pricing_cache_ttl: float = Field(
+        default=86400.0,
+        description="Seconds before the cached pricing catalog is refreshed",
+    )
+
     @model_validator(mode="after")
     def set_openrouter_fallback(self) -> Self:
         """Fall back to openai_api_key if openrouter_api_key is not set."""
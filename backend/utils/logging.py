@@ -1,12 +1,28 @@
 """Logging configuration for the application."""
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
 # Singleton logger instance
 _logger: logging.Logger | None = None
 
 
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records unformatted.
+
+    The stock prepare() formats the message on the emitting thread (the
+    event loop); the queue stays in-process, so the listener's handler can
+    do the %-formatting instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
 def _create_logger() -> logging.Logger:
     """Create and configure the singleton logger."""
     log = logging.getLogger("dts")
@@ -18,7 +34,15 @@ def _create_logger() -> logging.Logger:
             datefmt="%Y-%m-%d %H:%M:%S",
         )
         handler.setFormatter(formatter)
-        log.addHandler(handler)
+
+        # Records are handed unformatted to a background thread that does the
+        # formatting and the stderr writes, so logging never blocks the event loop.
+        records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = QueueListener(records, handler)
+        listener.start()
+        atexit.register(listener.stop)
+
+        log.addHandler(_DeferredQueueHandler(records))
         log.setLevel(logging.INFO)
 
     return log
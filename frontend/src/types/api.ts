@@ -45,11 +45,15 @@ export interface PhaseUsage {
 export interface ModelUsage {
   input_tokens: number;
   output_tokens: number;
+  cached_input_tokens: number;
+  cache_write_tokens: number;
   requests: number;
   cost_usd: number;
   pricing: {
     input_per_million: number;
     output_per_million: number;
+    cached_input_per_million: number | null;
+    cache_write_per_million: number | null;
   };
 }
 
@@ -59,7 +63,9 @@ export interface TokenUsage {
     input_tokens: number;
     output_tokens: number;
     total_tokens: number;
+    cached_input_tokens: number;
     total_requests: number;
+    cached_calls: number;
     total_cost_usd: number;
   };
   by_phase: {
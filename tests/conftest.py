@@ -0,0 +1,88 @@
+"""Shared pytest configuration and test doubles."""
+
+import asyncio
+import os
+import re
+from typing import Any
+
+# backend.utils.config requires an API key at import time; tests never reach the network
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from backend.core.dts.types import DialogueNode  # noqa: E402
+from backend.llm.types import Completion, Message  # noqa: E402
+
+_TRAJECTORY_RE = re.compile(r"^--- Trajectory (\S+) ", re.MULTILINE)
+_GROUP_RE = re.compile(r"^=== Group (\S+) ===$", re.MULTILINE)
+
+
+class StubLLM:
+    """
+    Deterministic stand-in for the LLM client, answering each kind of judge prompt.
+
+    Every trajectory gets `score`. Prompts containing any `fail_on` substring
+    raise, trajectory ids in `omit` are left out of rankings and cohort scores,
+    and `honour_n=False` mimics a provider that ignores n > 1.
+    """
+
+    def __init__(
+        self,
+        score: float = 7.0,
+        honour_n: bool = True,
+        fail_on: tuple[str, ...] = (),
+        omit: frozenset[str] = frozenset(),
+    ) -> None:
+        self.score = score
+        self.honour_n = honour_n
+        self.fail_on = fail_on
+        self.omit = omit
+        # (prompt text, n) of every request, in order
+        self.requests: list[tuple[str, int | None]] = []
+
+    def count(self, marker: str) -> int:
+        """Number of requests whose prompt contained `marker`."""
+        return sum(marker in text for text, _ in self.requests)
+
+    async def complete(self, messages: list[Message], **kwargs: Any) -> Completion:
+        text = "\n".join(m.content or "" for m in messages)
+        n = kwargs.get("n")
+        self.requests.append((text, n))
+        await asyncio.sleep(0)
+        if any(marker in text for marker in self.fail_on):
+            raise RuntimeError("stub failure")
+
+        data = self._respond(text)
+        if n and self.honour_n:
+            samples = [Completion(message=Message.assistant("{}"), data=data) for _ in range(n)]
+            return Completion(message=Message.assistant("{}"), data=data, samples=samples)
+        return Completion(message=Message.assistant("{}"), data=data)
+
+    def _respond(self, text: str) -> dict[str, Any]:
+        if "=== Group " in text:
+            parts = _GROUP_RE.split(text)[1:]
+            return {
+                "rankings": {
+                    parent_id: self._ranking(body)
+                    for parent_id, body in zip(parts[::2], parts[1::2])
+                }
+            }
+        if "force-rank" in text:
+            return {"ranking": self._ranking(text)}
+        if "Trajectories to score" in text:
+            return {"scores": dict.fromkeys(self._ids(text), self.score)}
+        return {"total_score": self.score, "summary": "stub"}
+
+    def _ids(self, text: str) -> list[str]:
+        return [i for i in _TRAJECTORY_RE.findall(text) if i not in self.omit]
+
+    def _ranking(self, text: str) -> list[dict[str, Any]]:
+        return [
+            {"rank": rank, "trajectory_id": i, "score": self.score, "reason": "stub"}
+            for rank, i in enumerate(self._ids(text), start=1)
+        ]
+
+
+def make_node(node_id: str, parent_id: str, text: str | None = None) -> DialogueNode:
+    """A one-message node; `text` defaults to the id so histories differ."""
+    return DialogueNode(
+        id=node_id, parent_id=parent_id, messages=[Message.user(text or f"hello {node_id}")]
+    )
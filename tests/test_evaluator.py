@@ -0,0 +1,178 @@
+"""Tests for TrajectoryEvaluator batching, caching and fallback paths."""
+
+import asyncio
+
+from backend.core.dts.components.evaluator import COHORT_BATCH_SIZE, TrajectoryEvaluator
+from tests.conftest import StubLLM, make_node
+
+COHORT = "Trajectories to score"
+BATCHED = "=== Group "
+
+
+def _evaluator(llm: StubLLM, **kwargs) -> TrajectoryEvaluator:
+    return TrajectoryEvaluator(llm, "Help the user", **kwargs)  # type: ignore[arg-type]
+
+
+def test_single_flight_shares_concurrent_calls() -> None:
+    """Identical judge calls in flight together send one request and share its result."""
+    llm = StubLLM()
+    evaluator = _evaluator(llm)
+
+    async def main() -> None:
+        results = await asyncio.gather(
+            *(evaluator._call_llm_json("system", "user") for _ in range(5))
+        )
+        assert all(result is results[0] for result in results)
+        await asyncio.gather(
+            *(evaluator._call_llm_json_samples("system", "other", 3) for _ in range(4))
+        )
+
+    asyncio.run(main())
+    assert [n for _, n in llm.requests] == [None, 3]
+    assert not evaluator._inflight
+
+
+def test_single_flight_off_without_cache() -> None:
+    """With caching disabled every call goes to the provider."""
+    llm = StubLLM()
+    evaluator = _evaluator(llm, cache_size=0)
+
+    async def main() -> None:
+        await asyncio.gather(*(evaluator._call_llm_json("system", "user") for _ in range(3)))
+
+    asyncio.run(main())
+    assert len(llm.requests) == 3
+
+
+def test_repeat_calls_served_from_cache() -> None:
+    """A repeated prompt is answered from the cache and reported as a cache hit."""
+    llm = StubLLM()
+    hits: list[None] = []
+    evaluator = _evaluator(llm, on_cache_hit=lambda: hits.append(None))
+
+    async def main() -> None:
+        first = await evaluator._call_llm_json_samples("system", "user", 3)
+        second = await evaluator._call_llm_json_samples("system", "user", 3)
+        assert first == second
+
+    asyncio.run(main())
+    assert len(llm.requests) == 1
+    assert len(hits) == 3
+
+
+def test_provider_ignoring_n_falls_back_to_single_calls() -> None:
+    """Missing samples are topped up singly, and later calls skip the n-sample request."""
+    llm = StubLLM(honour_n=False)
+    evaluator = _evaluator(llm, cache_size=0)
+
+    async def main() -> None:
+        for user_prompt in ("a", "b"):
+            results = await evaluator._call_llm_json_samples("system", user_prompt, 3)
+            assert len(results) == 3 and all(isinstance(r, dict) for r in results)
+
+    asyncio.run(main())
+    assert evaluator._n_supported is False
+    assert [n for _, n in llm.requests] == [3, None, None, None, None, None]
+
+
+def test_cohort_scores_single_nodes_in_chunks() -> None:
+    """Unrelated single nodes are scored in cohorts of COHORT_BATCH_SIZE; a lone leftover alone."""
+    llm = StubLLM(score=8.0)
+    evaluator = _evaluator(llm)
+    nodes = [make_node(f"n{i}", f"p{i}") for i in range(2 * COHORT_BATCH_SIZE + 1)]
+
+    scores = asyncio.run(evaluator.evaluate_comparative(nodes))
+
+    assert set(scores) == {node.id for node in nodes}
+    assert all(score.aggregated_score == 8.0 for score in scores.values())
+    assert llm.count(COHORT) == 2
+    assert len(llm.requests) == 3
+
+
+def test_cohort_nodes_missing_from_response_judged_absolutely() -> None:
+    """Nodes no cohort sample scored fall back to absolute judging; the rest keep their score."""
+    llm = StubLLM(score=6.0, omit=frozenset({"n0"}))
+    evaluator = _evaluator(llm)
+    nodes = [make_node(f"n{i}", f"p{i}") for i in range(3)]
+
+    scores = asyncio.run(evaluator.evaluate_comparative(nodes))
+
+    assert len(scores) == 3
+    assert scores["n0"].aggregated_score == 6.0
+    assert nodes[0].stats.judge_scores == [6.0, 6.0, 6.0]
+    assert sum(COHORT not in text for text, _ in llm.requests) == 1
+
+
+def test_failed_cohort_falls_back_to_absolute() -> None:
+    """A cohort whose every sample fails is judged node by node."""
+    llm = StubLLM(score=5.0, fail_on=(COHORT,))
+    evaluator = _evaluator(llm, cache_size=0)
+    nodes = [make_node(f"n{i}", f"p{i}") for i in range(3)]
+
+    scores = asyncio.run(evaluator.evaluate_comparative(nodes))
+
+    assert {node_id: score.aggregated_score for node_id, score in scores.items()} == {
+        "n0": 5.0,
+        "n1": 5.0,
+        "n2": 5.0,
+    }
+
+
+def test_sibling_groups_ranked_in_one_batched_call() -> None:
+    """Several sibling groups share one batched ranking call."""
+    llm = StubLLM(score=7.5)
+    evaluator = _evaluator(llm)
+    nodes = [make_node(f"{parent}{i}", parent) for parent in "abc" for i in range(2)]
+
+    scores = asyncio.run(evaluator.evaluate_comparative(nodes))
+
+    assert all(scores[node.id].aggregated_score == 7.5 for node in nodes)
+    assert len(llm.requests) == 1
+    assert llm.count(BATCHED) == 1
+
+
+def test_failed_batch_falls_back_per_group() -> None:
+    """A failed batched call ranks each group on its own; a group that fails again scores 0."""
+    llm = StubLLM(score=7.0, fail_on=(BATCHED, "--- Trajectory b0 "))
+    evaluator = _evaluator(llm, cache_size=0)
+    nodes = [make_node(f"{parent}{i}", parent) for parent in "abc" for i in range(2)]
+
+    scores = asyncio.run(evaluator.evaluate_comparative(nodes))
+
+    assert {node_id: score.aggregated_score for node_id, score in scores.items()} == {
+        "a0": 7.0,
+        "a1": 7.0,
+        "b0": 0.0,
+        "b1": 0.0,
+        "c0": 7.0,
+        "c1": 7.0,
+    }
+
+
+def test_group_missing_from_batch_response_ranked_separately() -> None:
+    """Groups the batched response leaves out are ranked with their own call."""
+    llm = StubLLM(score=7.0, omit=frozenset({"b0", "b1"}))
+    evaluator = _evaluator(llm)
+    nodes = [make_node(f"{parent}{i}", parent) for parent in "ab" for i in range(2)]
+
+    asyncio.run(evaluator.evaluate_comparative(nodes))
+
+    assert llm.count(BATCHED) == 1
+    assert len(llm.requests) == 2
+    # The separate call is omitted too, so the group's nodes score 0
+    assert nodes[2].stats.aggregated_score == 0.0
+    assert nodes[0].stats.aggregated_score == 7.0
+
+
+def test_duplicate_siblings_judged_once() -> None:
+    """Siblings with identical histories copy the first one's result, not share it."""
+    llm = StubLLM(score=7.0)
+    evaluator = _evaluator(llm)
+    nodes = [make_node("a0", "a", "same"), make_node("a1", "a", "same"), make_node("a2", "a")]
+
+    scores = asyncio.run(evaluator.evaluate_comparative(nodes))
+
+    assert set(scores) == {"a0", "a1", "a2"}
+    assert llm.requests[0][0].count("--- Trajectory ") == 2
+    assert nodes[1].stats.judge_scores == nodes[0].stats.judge_scores
+    assert nodes[1].stats.judge_scores is not nodes[0].stats.judge_scores
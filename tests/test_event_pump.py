@@ -0,0 +1,114 @@
+"""Tests for EventPump ordering, batching, flushing and overflow handling."""
+
+import asyncio
+import logging
+from typing import Any
+
+from backend.core.dts.utils import BATCH_EVENT, EventPump
+
+logger = logging.getLogger("test")
+
+
+def test_async_events_delivered_in_order() -> None:
+    """Events reach an async callback in emit order, and flush() waits for all of them."""
+    received: list[tuple[str, Any]] = []
+
+    async def callback(event_type: str, data: dict[str, Any]) -> None:
+        await asyncio.sleep(0)
+        received.append((event_type, data["i"]))
+
+    async def main() -> None:
+        pump = EventPump(callback, logger)
+        for i in range(50):
+            pump.emit("node_added", {"i": i})
+        await pump.flush()
+
+    asyncio.run(main())
+    assert received == [("node_added", i) for i in range(50)]
+
+
+def test_sync_callback_called_inline() -> None:
+    """A sync callback runs inside emit(), without a worker task."""
+    received: list[str] = []
+    pump = EventPump(lambda event_type, _data: received.append(event_type), logger)
+    pump.emit("phase", {})
+    assert received == ["phase"]
+
+
+def test_batch_callback_receives_backlog_together() -> None:
+    """Events queued while a batch callback is busy arrive as one batch, in order."""
+    batches: list[list[int]] = []
+
+    async def callback(event_type: str, data: dict[str, Any]) -> None:
+        assert event_type == BATCH_EVENT
+        batches.append([e["data"]["i"] for e in data["events"]])
+        await asyncio.sleep(0)
+
+    callback.batch = True  # type: ignore[attr-defined]
+
+    async def main() -> None:
+        pump = EventPump(callback, logger, max_batch=4)
+        for i in range(10):
+            pump.emit("node_added", {"i": i})
+        await pump.flush()
+
+    asyncio.run(main())
+    assert [i for batch in batches for i in batch] == list(range(10))
+    assert max(map(len, batches)) == 4
+
+
+def test_callback_error_does_not_stop_delivery() -> None:
+    """A failing callback is logged and later events are still delivered."""
+    received: list[int] = []
+
+    async def callback(_event_type: str, data: dict[str, Any]) -> None:
+        if data["i"] == 1:
+            raise RuntimeError("boom")
+        received.append(data["i"])
+
+    async def main() -> None:
+        pump = EventPump(callback, logger)
+        for i in range(3):
+            pump.emit("node_added", {"i": i})
+        await pump.flush()
+
+    asyncio.run(main())
+    assert received == [0, 2]
+
+
+def test_overflow_drops_only_progress_events() -> None:
+    """A full buffer drops the oldest progress events and keeps every structural one."""
+    received: list[tuple[str, int]] = []
+
+    async def main() -> None:
+        gate = asyncio.Event()
+
+        async def callback(event_type: str, data: dict[str, Any]) -> None:
+            await gate.wait()
+            received.append((event_type, data["i"]))
+
+        pump = EventPump(callback, logger, maxsize=4)
+        pump.emit("node_added", {"i": 0})
+        await asyncio.sleep(0)  # the worker takes event 0 and blocks on the gate
+        pump.emit("token_update", {"i": 1})
+        pump.emit("node_added", {"i": 2})
+        pump.emit("phase", {"i": 3})
+        pump.emit("nodes_pruned", {"i": 4})
+        # Buffer full: the oldest progress event (1) makes room
+        pump.emit("node_added", {"i": 5})
+        # Full again: 3 makes room, then nothing droppable is left
+        pump.emit("node_updated", {"i": 6})
+        pump.emit("token_update", {"i": 7})  # dropped itself
+        pump.emit("node_added", {"i": 8})  # structural: buffered past the limit
+        gate.set()
+        await pump.flush()
+
+    asyncio.run(main())
+    assert received == [
+        ("node_added", 0),
+        ("node_added", 2),
+        ("nodes_pruned", 4),
+        ("node_added", 5),
+        ("node_updated", 6),
+        ("node_added", 8),
+    ]
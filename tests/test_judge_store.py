@@ -0,0 +1,122 @@
+"""Tests for the persistent judge response cache."""
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+from backend.core.dts.components.evaluator import TrajectoryEvaluator, _JudgeStore
+
+
+def test_round_trip_across_reopen(tmp_path: Path) -> None:
+    """A stored response is read back, including by a later store on the same file."""
+    path = str(tmp_path / "sub" / "judge.sqlite")
+
+    async def main() -> None:
+        store = _JudgeStore.open(path, ttl=60)
+        assert store is not None
+        await store.put("k", {"total_score": 7.0})
+        assert await store.get("k") == {"total_score": 7.0}
+        assert await store.get("other") is None
+        store.close()
+
+        reopened = _JudgeStore.open(path, ttl=60)
+        assert reopened is not None
+        assert await reopened.get("k") == {"total_score": 7.0}
+        reopened.close()
+
+    asyncio.run(main())
+
+
+def test_expired_rows_miss_and_are_purged_on_open(tmp_path: Path) -> None:
+    """Rows older than the TTL are never returned and are deleted on the next open."""
+    path = str(tmp_path / "judge.sqlite")
+
+    async def main() -> None:
+        store = _JudgeStore.open(path, ttl=60)
+        assert store is not None
+        await store.put("old", {"total_score": 1.0})
+        await store.put("new", {"total_score": 2.0})
+        db = sqlite3.connect(path)
+        db.execute("UPDATE judge_responses SET created = ? WHERE key = 'old'", (time.time() - 120,))
+        db.commit()
+        db.close()
+        assert await store.get("old") is None
+        assert await store.get("new") == {"total_score": 2.0}
+        store.close()
+
+    asyncio.run(main())
+
+    _JudgeStore.open(path, ttl=60).close()
+    db = sqlite3.connect(path)
+    assert [key for (key,) in db.execute("SELECT key FROM judge_responses")] == ["new"]
+    db.close()
+
+
+def test_corrupt_row_is_a_miss(tmp_path: Path) -> None:
+    """Unparseable or non-object rows read as a cache miss instead of raising."""
+    path = str(tmp_path / "judge.sqlite")
+
+    async def main() -> None:
+        store = _JudgeStore.open(path, ttl=60)
+        assert store is not None
+        await store.put("bad", {"total_score": 1.0})
+        await store.put("list", {"total_score": 1.0})
+        db = sqlite3.connect(path)
+        db.execute("UPDATE judge_responses SET data = '{not json' WHERE key = 'bad'")
+        db.execute("UPDATE judge_responses SET data = '[1, 2]' WHERE key = 'list'")
+        db.commit()
+        db.close()
+        assert await store.get("bad") is None
+        assert await store.get("list") is None
+        store.close()
+
+    asyncio.run(main())
+
+
+def test_locked_database_does_not_raise(tmp_path: Path) -> None:
+    """A write blocked by another process's lock gives up after the timeout and is dropped."""
+    path = str(tmp_path / "judge.sqlite")
+
+    async def main() -> None:
+        store = _JudgeStore.open(path, ttl=60)
+        assert store is not None
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN EXCLUSIVE")
+        start = time.monotonic()
+        await store.put("k", {"total_score": 7.0})
+        assert time.monotonic() - start < 5 * _JudgeStore._LOCK_TIMEOUT
+        other.execute("ROLLBACK")
+        other.close()
+        assert await store.get("k") is None
+        store.close()
+
+    asyncio.run(main())
+
+
+def test_unusable_path_disables_store(tmp_path: Path) -> None:
+    """A path that cannot be opened leaves the evaluator with its in-memory cache only."""
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    assert _JudgeStore.open(str(blocker / "judge.sqlite"), ttl=60) is None
+
+    evaluator = TrajectoryEvaluator(None, "goal", cache_path=str(blocker / "judge.sqlite"))  # type: ignore[arg-type]
+    assert evaluator._store is None
+
+
+def test_evaluator_close_is_idempotent(tmp_path: Path) -> None:
+    """close() releases the store, can be repeated, and later lookups simply miss."""
+    evaluator = TrajectoryEvaluator(None, "goal", cache_path=str(tmp_path / "judge.sqlite"))  # type: ignore[arg-type]
+    assert evaluator._store is not None
+    evaluator.close()
+    evaluator.close()
+    assert evaluator._store is None
+    assert asyncio.run(evaluator._cache_lookup("missing")) is None
+
+
+def test_no_store_when_cache_disabled(tmp_path: Path) -> None:
+    """cache_size=0 (or a judge temperature too high to cache) skips the store entirely."""
+    path = tmp_path / "judge.sqlite"
+    evaluator = TrajectoryEvaluator(None, "goal", cache_size=0, cache_path=str(path))  # type: ignore[arg-type]
+    assert evaluator._store is None
+    assert not path.exists()
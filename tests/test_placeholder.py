@@ -1,14 +0,0 @@
-"""Placeholder test file - to be replaced with actual unit tests.
-
-See Issue #11: Add Unit Tests with Pytest
-https://github.com/MVPandey/DTS/issues/11
-"""
-
-
-def test_placeholder() -> None:
-    """Placeholder test that always passes.
-
-    This ensures pytest has something to run until real tests are implemented.
-    Remove this file once actual tests are added.
-    """
-    assert True, "Placeholder test - replace with real tests"
@@ -0,0 +1,87 @@
+"""Tests for run result serialization and token cost tracking."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from backend.core.dts import types
+from backend.core.dts.types import (
+    DialogueNode,
+    DTSRunResult,
+    ModelPricing,
+    NodeStatus,
+    Strategy,
+    TokenTracker,
+    UserIntent,
+)
+from backend.llm.types import Message, Usage
+
+
+def _result(branches: int) -> DTSRunResult:
+    root = DialogueNode(id="root", messages=[Message.user("Hi")])
+    result = DTSRunResult(best_score=7.5, total_rounds=2, token_usage={"totals": {"cost": 0.1}})
+    result.add_node(root)
+    for i in range(branches):
+        node = DialogueNode(
+            id=f"n{i}",
+            parent_id="root",
+            depth=1,
+            status=NodeStatus.PRUNED if i % 2 else NodeStatus.ACTIVE,
+            strategy=Strategy(tagline=f"Strategy {i}", description="Naïve “quoted” — text"),
+            user_intent=UserIntent(
+                id=f"i{i}",
+                label="Curious",
+                description="d",
+                emotional_tone="engaged",
+                cognitive_stance="questioning",
+            ),
+            messages=[Message.user("Hi"), Message.assistant(f'Reply {i}\nwith "quotes" ✓')],
+            prune_reason="low score" if i % 2 else None,
+        )
+        node.stats.judge_scores = [float(i), 7.0, 8.0]
+        node.stats.aggregated_score = 7.0 + i / 10
+        node.stats.critiques = {"strengths": ["s"], "weaknesses": [], "key_moment": None}
+        result.add_node(node)
+    result.best_node_id = "n1" if branches > 1 else None
+    return result
+
+
+@pytest.mark.parametrize("branches", [0, 1, 3])
+def test_save_json_matches_to_json(tmp_path: Path, branches: int) -> None:
+    """save_json() writes byte-for-byte what to_json() returns."""
+    result = _result(branches)
+    path = tmp_path / "result.json"
+    result.save_json(str(path))
+    assert path.read_bytes() == result.to_json().encode()
+    assert json.loads(path.read_bytes())["summary"]["total_branches"] == branches
+
+
+@pytest.fixture
+def pricing(monkeypatch: pytest.MonkeyPatch) -> Iterator[dict[str, ModelPricing]]:
+    """A loaded, network-free pricing catalog that tests can change."""
+    catalog = {"m": ModelPricing("m", 1.0, 2.0)}
+    monkeypatch.setattr(types, "_pricing_cache", catalog)
+    monkeypatch.setattr(types, "_pricing_loaded", True)
+    types._lookup_pricing.cache_clear()
+    yield catalog
+    types._lookup_pricing.cache_clear()
+
+
+def test_cost_tracks_pricing_updates(
+    pricing: dict[str, ModelPricing], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The running cost is recomputed once the pricing version changes."""
+    tracker = TokenTracker(model_name="m")
+    usage = Usage(prompt_tokens=1_000_000, completion_tokens=1_000_000, total_tokens=2_000_000)
+    tracker.add_usage("m", usage, "judging")
+    assert tracker.total_cost == pytest.approx(3.0)
+    tracker.add_usage("m", usage, "judging")
+    assert tracker.total_cost == pytest.approx(6.0)
+
+    pricing["m"] = ModelPricing("m", 10.0, 20.0)
+    types._lookup_pricing.cache_clear()
+    monkeypatch.setattr(types, "_pricing_version", types._pricing_version + 1)
+    assert tracker.total_cost == pytest.approx(60.0)
+    assert tracker.get_pricing().input_cost_per_million == 10.0